@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WarehouseAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "warehouse_app"
+
+    def ready(self):
+        from . import signals  # noqa: F401
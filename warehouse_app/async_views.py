@@ -0,0 +1,195 @@
+"""
+Async versions of the high-traffic read endpoints, for the ASGI deployment.
+
+They return the same payloads as the DRF views in views.py but run on the
+event loop: the JWT is validated inline, users come from the in-process
+cache or the async ORM, and cached catalog payloads are served without a
+worker thread. DRF views are sync only, so these are plain Django views.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import CachedJWTAuthentication
+from .catalog_cache import (
+    aget_catalog_state,
+    catalog_cache_key,
+    catalog_etag,
+    is_not_modified,
+    set_validators,
+)
+from .exports import filter_period
+from .models import Category, Order, Product
+from .pagination import OrderCursorPagination, ProductCursorPagination
+from .serializers import (
+    CategorySerializer,
+    OrderSerializer,
+    OrderSummarySerializer,
+    ProductSerializer,
+)
+
+authenticator = CachedJWTAuthentication()
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    # Render like DRF's JSONRenderer so payloads match the sync views
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type="application/json",
+    )
+
+
+def exception_response(exc):
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    response = json_response(data, exc.status_code)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        response["WWW-Authenticate"] = authenticator.authenticate_header(None)
+    return response
+
+
+def async_api_view(login_required=True):
+    """
+    Wrap an async GET view with JWT authentication, mirroring DRF's
+    IsAuthenticated/AllowAny handling and error payloads.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return exception_response(exceptions.MethodNotAllowed(request.method))
+            try:
+                result = await authenticator.aauthenticate(request)
+                if result is not None:
+                    request.user = result[0]
+                elif login_required:
+                    raise exceptions.NotAuthenticated()
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return exception_response(exc)
+
+        return wrapper
+
+    return decorator
+
+
+async def paginated(request, paginator, queryset, serializer_class):
+    """
+    Serialize ``queryset`` as a plain list, or as a cursor page when the
+    client asks for one. DRF's paginator is sync only, so pages are fetched
+    in a worker thread.
+    """
+    params = request.GET
+    if (
+        paginator.cursor_query_param not in params
+        and paginator.page_size_query_param not in params
+    ):
+        objects = [obj async for obj in queryset]
+        return serializer_class(objects, many=True, context={"request": request}).data
+
+    drf_request = Request(request)
+    page = await sync_to_async(paginator.paginate_queryset)(queryset, drf_request)
+    data = serializer_class(page, many=True, context={"request": request}).data
+    return paginator.get_paginated_response(data).data
+
+
+async def cached_catalog_response(request, render, exists=None):
+    """Async counterpart of CatalogCacheMixin.cached_response."""
+    version, modified = await aget_catalog_state()
+
+    if is_not_modified(request, catalog_etag(version), modified) and (
+        exists is None or await exists()
+    ):
+        response = HttpResponseNotModified()
+    else:
+        key = catalog_cache_key(request, version)
+        data = await cache.aget(key)
+        if data is None:
+            data = await render()
+            await cache.aset(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        response = json_response(data)
+
+    return set_validators(response, version, modified)
+
+
+@async_api_view(login_required=False)
+async def product_list(request):
+    async def render():
+        queryset = Product.objects.select_related("category").order_by("product_id")
+        return await paginated(
+            request, ProductCursorPagination(), queryset, ProductSerializer
+        )
+
+    return await cached_catalog_response(request, render)
+
+
+@async_api_view()
+async def product_detail(request, product_id):
+    async def render():
+        try:
+            product = await Product.objects.select_related("category").aget(
+                product_id=product_id
+            )
+        except Product.DoesNotExist:
+            raise exceptions.NotFound("No Product matches the given query.")
+        return ProductSerializer(product, context={"request": request}).data
+
+    return await cached_catalog_response(
+        request, render, Product.objects.filter(product_id=product_id).aexists
+    )
+
+
+@async_api_view()
+async def category_list(request):
+    async def render():
+        categories = [category async for category in Category.objects.all()]
+        return CategorySerializer(categories, many=True).data
+
+    return await cached_catalog_response(request, render)
+
+
+@async_api_view()
+async def order_list(request):
+    try:
+        queryset = filter_period(
+            Order.objects.filter(user=request.user),
+            request.GET,
+            "order_date",
+            status_field="order_status",
+        ).order_by("-order_date", "-id")
+    except ValidationError as e:
+        return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+
+    if request.GET.get("view") == "summary":
+        queryset, serializer_class = queryset.with_item_count(), OrderSummarySerializer
+    else:
+        queryset, serializer_class = queryset.with_items(), OrderSerializer
+
+    return json_response(
+        await paginated(request, OrderCursorPagination(), queryset, serializer_class)
+    )
+
+
+@async_api_view()
+async def order_detail(request, pk):
+    try:
+        order = await Order.objects.with_items().aget(pk=pk, user=request.user)
+    except Order.DoesNotExist:
+        raise exceptions.NotFound("No Order matches the given query.")
+    return json_response(OrderSerializer(order).data)
+
+
+# The payment-status endpoint returns the order, like its sync counterpart
+order_payment_status = order_detail
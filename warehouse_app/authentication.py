@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser
+
+# The user columns the API views read from request.user
+_CACHED_COLUMNS = {
+    "id",
+    "email",
+    "username",
+    "name",
+    "role",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+}
+# Model.from_db() expects values in model field order
+CACHED_USER_FIELDS = tuple(
+    field.attname
+    for field in CustomUser._meta.concrete_fields
+    if field.attname in _CACHED_COLUMNS
+)
+
+
+class UserCache:
+    """
+    Bounded LRU of user field values with per-entry expiry, shared by the
+    threads of one process.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (user_id, token) -> (expires, values)
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, values):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+user_cache = UserCache(
+    max_entries=settings.AUTH_USER_CACHE["MAX_ENTRIES"],
+    ttl=settings.AUTH_USER_CACHE["TTL"],
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from an in-process cache keyed
+    by user id and token, so repeat requests with the same access token
+    skip the user query. Entries are dropped when the user is saved or
+    deleted (see signals.py) and expire after ``AUTH_USER_CACHE["TTL"]``
+    seconds, which bounds staleness across worker processes.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the current password hash
+            return super().get_user(validated_token)
+
+        key = self.cache_key(validated_token)
+        values = user_cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            self.cache_user(key, user)
+            return user
+        return self.cached_user(values)
+
+    async def aauthenticate(self, request):
+        """authenticate() for the async views, without blocking the loop."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        key = self.cache_key(validated_token)
+        values = user_cache.get(key)
+        if values is not None:
+            return self.cached_user(values)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        self.cache_user(key, user)
+        return user
+
+    def cache_key(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        return (str(user_id), validated_token.get(api_settings.JTI_CLAIM))
+
+    def cache_user(self, key, user):
+        user_cache.set(key, tuple(getattr(user, field) for field in CACHED_USER_FIELDS))
+
+    def cached_user(self, values):
+        # Only active users are cached, and saves evict, so no is_active
+        # check is needed here. Other columns load lazily if ever read.
+        return CustomUser.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
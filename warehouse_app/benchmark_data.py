@@ -0,0 +1,260 @@
+"""
+Deterministic synthetic data for the benchmark suite.
+
+The same seed and scale always produce the same catalog, users and order
+history, so results from different commits are comparable. Everything is
+written with bulk inserts in batches; at full scale expect several minutes.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .catalog_cache import bump_catalog_version
+from .models import (
+    Category,
+    CustomUser,
+    Order,
+    OrderItem,
+    Product,
+    Transaction,
+)
+from .rollups import rebuild_rollups
+
+# Row counts at --scale 1
+FULL_SCALE = {
+    "categories": 100,
+    "products": 100_000,
+    "users": 10_000,
+    "orders": 1_000_000,
+}
+MAX_ITEMS_PER_ORDER = 5
+HISTORY_DAYS = 365
+# Order history ends here rather than at "now" so reruns are identical
+HISTORY_END = datetime(2025, 6, 30, tzinfo=dt_timezone.utc)
+# Orders placed within this window may still be awaiting payment
+CHECKOUT_WINDOW = timedelta(days=2)
+LOW_STOCK_SHARE = 0.01
+
+SKU_PREFIX = "BENCH-"
+PASSWORD = "bench-password"
+STAFF_EMAIL = "bench-staff@example.com"
+# Rollups are rebuilt a month at a time to bound memory use
+ROLLUP_CHUNK_DAYS = 31
+
+
+def user_email(number):
+    return f"bench-user-{number:05d}@example.com"
+
+
+def scaled_sizes(scale):
+    return {name: max(1, round(count * scale)) for name, count in FULL_SCALE.items()}
+
+
+def is_seeded():
+    return Product.objects.filter(sku__startswith=SKU_PREFIX).exists()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk inserts set ``auto_now``/``auto_now_add`` fields themselves."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _status(rng, age):
+    """(order_status, payment_status, transaction status or None) for an order."""
+    if age < CHECKOUT_WINDOW and rng.random() < 0.5:
+        return "pending", "pending", None
+    roll = rng.random()
+    if roll < 0.85:
+        return "processed", "paid", "completed"
+    if roll < 0.93:
+        return "cancelled", "cancelled", None
+    return "pending", "failed", "failed"
+
+
+class Seeder:
+    def __init__(self, scale=1.0, seed=0, batch_size=5000, log=None):
+        self.sizes = scaled_sizes(scale)
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+    def run(self):
+        with explicit_timestamps(CustomUser, Order, Transaction):
+            categories = self.seed_categories()
+            prices = self.seed_products(categories)
+            users = self.seed_users()
+            self.seed_orders(users, prices)
+        self.seed_rollups()
+
+        bump_catalog_version()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return self.sizes
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def seed_categories(self):
+        categories = Category.objects.bulk_create(
+            Category(category_name=f"Bench category {n:03d}")
+            for n in range(self.sizes["categories"])
+        )
+        self.log(f"{len(categories)} categories")
+        return [category.category_id for category in categories]
+
+    def seed_products(self, category_ids):
+        """Create the catalog; returns {product_id: price}."""
+        rng = self.rng
+        prices = {}
+        for batch in self.batches(self.sizes["products"]):
+            products = []
+            for n in batch:
+                threshold = rng.randint(5, 50)
+                if rng.random() < LOW_STOCK_SHARE:
+                    stock = rng.randint(0, threshold)
+                else:
+                    stock = rng.randint(threshold + 1, 5000)
+                products.append(
+                    Product(
+                        sku=f"{SKU_PREFIX}{n:06d}",
+                        name=f"Bench product {n:06d}",
+                        category_id=rng.choice(category_ids),
+                        stock_quantity=stock,
+                        price_per_unit=Decimal(rng.randint(100, 50000)) / 100,
+                        reorder_threshold=threshold,
+                        reorder_quantity=rng.choice((50, 100, 250, 500)),
+                    )
+                )
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+            prices.update(
+                (product.product_id, product.price_per_unit) for product in products
+            )
+        self.log(f"{len(prices)} products")
+        return prices
+
+    def seed_users(self):
+        # Hashing is deliberately slow, so every user shares one hash
+        password = make_password(PASSWORD)
+        joined = HISTORY_END - timedelta(days=HISTORY_DAYS)
+        CustomUser.objects.create_user(
+            STAFF_EMAIL,
+            "bench_staff",
+            PASSWORD,
+            role="admin",
+            is_staff=True,
+            date_joined=joined,
+        )
+        user_ids = []
+        for batch in self.batches(self.sizes["users"]):
+            with transaction.atomic():
+                users = CustomUser.objects.bulk_create(
+                    CustomUser(
+                        email=user_email(n),
+                        username=f"bench_user_{n:05d}",
+                        name=f"Bench User {n:05d}",
+                        password=password,
+                        date_joined=joined,
+                    )
+                    for n in batch
+                )
+            user_ids.extend(user.id for user in users)
+        self.log(f"{len(user_ids)} users")
+        return user_ids
+
+    def seed_orders(self, user_ids, prices):
+        rng = self.rng
+        product_ids = list(prices)
+        total = self.sizes["orders"]
+        start = HISTORY_END - timedelta(days=HISTORY_DAYS)
+        step = timedelta(days=HISTORY_DAYS) / total
+        items_created = 0
+
+        for batch in self.batches(total):
+            orders, lines, settlements = [], [], []
+            for n in batch:
+                # Dates rise with the id, as they do in production
+                placed = start + step * n + timedelta(seconds=rng.random())
+                order_status, payment_status, settled = _status(
+                    rng, HISTORY_END - placed
+                )
+                order_lines = [
+                    (product_id, rng.randint(1, 10), prices[product_id])
+                    for product_id in rng.sample(
+                        product_ids,
+                        min(rng.randint(1, MAX_ITEMS_PER_ORDER), len(product_ids)),
+                    )
+                ]
+                orders.append(
+                    Order(
+                        user_id=rng.choice(user_ids),
+                        order_number=f"BENCH{n:09d}",
+                        order_status=order_status,
+                        payment_status=payment_status,
+                        order_date=placed,
+                        total_price=sum(qty * price for _, qty, price in order_lines),
+                    )
+                )
+                lines.append(order_lines)
+                settlements.append(settled)
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                items = [
+                    OrderItem(
+                        order_id=order.id,
+                        product_id=product_id,
+                        quantity=quantity,
+                        price=price,
+                    )
+                    for order, order_lines in zip(orders, lines)
+                    for product_id, quantity, price in order_lines
+                ]
+                OrderItem.objects.bulk_create(items)
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        order_id=order.id,
+                        user_id=order.user_id,
+                        amount=order.total_price,
+                        payment_status=settled,
+                        stripe_payment_intent_id=f"pi_bench_{order.order_number}",
+                        transaction_date=order.order_date,
+                        created_at=order.order_date,
+                        updated_at=order.order_date,
+                    )
+                    for order, settled in zip(orders, settlements)
+                    if settled
+                )
+            items_created += len(items)
+            self.log(f"{batch.stop}/{total} orders")
+        self.log(f"{total} orders with {items_created} items")
+
+    def seed_rollups(self):
+        day = (HISTORY_END - timedelta(days=HISTORY_DAYS)).date()
+        chunk = timedelta(days=ROLLUP_CHUNK_DAYS)
+        while day <= HISTORY_END.date():
+            rebuild_rollups(
+                day, min(day + chunk - timedelta(days=1), HISTORY_END.date())
+            )
+            day += chunk
+        self.log("Sales rollups rebuilt")
@@ -0,0 +1,569 @@
+"""
+Latency and cost benchmarks for every route in ``warehouse_app.urls``.
+
+Each scenario is sent through the Django test client against the data
+loaded by ``seed_benchmark_data``, so the figures cover the whole request
+path (middleware, authentication, views, serialization) but not a real
+server. A timed pass gives the latency percentiles; a separate
+instrumented pass counts SQL queries, rows fetched and peak Python memory
+per request, since tracing slows requests down. Write scenarios change
+the data, so run against a dedicated database.
+"""
+
+import csv
+import io
+import json
+import platform
+import time
+import tracemalloc
+import uuid
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .benchmark_data import (
+    HISTORY_END,
+    PASSWORD,
+    SKU_PREFIX,
+    STAFF_EMAIL,
+    is_seeded,
+    user_email,
+)
+from .models import Category, CustomUser, Order, OrderItem, Product, Transaction
+from .payments import get_gateway
+from .product_io import COLUMNS
+from .services import CartLine, create_order
+from .tokens import FilteredRefreshToken
+
+# Arguments of one request. ``content_type=None`` sends multipart form
+# data; ``extra`` holds WSGI environ entries such as signature headers.
+Call = namedtuple(
+    "Call",
+    ["kwargs", "query", "data", "content_type", "extra"],
+    defaults=(None, "", None, "application/json", None),
+)
+# ``call`` builds the request from the fixtures, outside the timed section.
+# ``auth`` is the fixture user to authenticate as, or None.
+Scenario = namedtuple("Scenario", ["name", "route", "method", "auth", "call"])
+
+WEBHOOK_SECRET = "whsec_benchmark"
+CART_SIZE = 5
+IMPORT_ROWS = 100
+REPORT_DAYS = 30
+
+
+def percentile(sorted_values, fraction):
+    index = round(fraction * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+class Fixtures:
+    """The users, tokens and rows that scenarios send requests about."""
+
+    def __init__(self):
+        if not is_seeded():
+            raise LookupError("No benchmark data, run seed_benchmark_data first")
+        self.users = {
+            "trader": CustomUser.objects.get(email=user_email(0)),
+            "staff": CustomUser.objects.get(email=STAFF_EMAIL),
+        }
+        self.trader = self.users["trader"]
+
+        catalog = Product.objects.filter(sku__startswith=SKU_PREFIX).order_by(
+            "product_id"
+        )
+        in_stock = catalog.filter(stock_quantity__gte=100)
+        self.product = in_stock.first()
+        self.cart = list(in_stock[:CART_SIZE])
+        self.category_id = self.product.category_id
+        self.import_file = self.build_import_file(catalog[:IMPORT_ROWS])
+
+        self.order = (
+            Order.objects.filter(user=self.trader, order_status="processed")
+            .order_by("-order_date", "-id")
+            .first()
+        )
+        self.report_to = HISTORY_END.date()
+        self.report_from = self.report_to - timedelta(days=REPORT_DAYS - 1)
+        self.sequence = 0
+        self.refresh_tokens()
+
+    def build_import_file(self, products):
+        # Rewrites existing products unchanged, so repeated imports are stable
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(COLUMNS)
+        for product in products.select_related("category"):
+            writer.writerow(
+                [
+                    product.sku,
+                    product.name,
+                    product.category.category_name,
+                    product.stock_quantity,
+                    product.price_per_unit,
+                    product.reorder_threshold,
+                    product.reorder_quantity,
+                ]
+            )
+        return output.getvalue().encode()
+
+    def refresh_tokens(self):
+        self.headers = {
+            name: {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+            for name, user in self.users.items()
+        }
+
+    def next(self):
+        self.sequence += 1
+        return self.sequence
+
+    def refresh_token(self):
+        return str(FilteredRefreshToken.for_user(self.trader))
+
+    def registration(self):
+        tag = uuid.uuid4().hex[:12]
+        return {
+            "email": f"bench-register-{tag}@example.com",
+            "username": f"bench_register_{tag}",
+            "password": PASSWORD,
+        }
+
+    def cart_items(self, quantity=1):
+        return [
+            {
+                "product": product.product_id,
+                "quantity": quantity,
+                "price": str(product.price_per_unit),
+            }
+            for product in self.cart
+        ]
+
+    def pending_order(self):
+        product = self.cart[0]
+        return create_order(
+            self.trader, [CartLine(product.product_id, 1, product.price_per_unit)]
+        )
+
+    def pending_transaction(self):
+        intent = get_gateway().create_payment_intent(
+            amount=int(self.order.total_price * 100),
+            currency="usd",
+            metadata={"order_id": self.order.id},
+        )
+        return Transaction.objects.create(
+            order=self.order,
+            user=self.trader,
+            amount=self.order.total_price,
+            stripe_payment_intent_id=intent.id,
+        )
+
+    def webhook(self):
+        event = {
+            "id": f"evt_bench_{uuid.uuid4().hex[:24]}",
+            "object": "event",
+            "type": "payment_intent.succeeded",
+            "created": int(time.time()),
+            "livemode": False,
+            "data": {
+                "object": {
+                    "id": f"pi_bench_{self.order.order_number}",
+                    "object": "payment_intent",
+                    "status": "succeeded",
+                }
+            },
+        }
+        payload = json.dumps(event)
+        signature = get_gateway().sign(payload, int(time.time()))
+        return Call(data=payload, extra={"HTTP_STRIPE_SIGNATURE": signature})
+
+
+SCENARIOS = (
+    Scenario(
+        "register", "register", "post", None, lambda f: Call(data=f.registration())
+    ),
+    Scenario(
+        "login",
+        "login",
+        "post",
+        None,
+        lambda f: Call(data={"email": f.trader.email, "password": PASSWORD}),
+    ),
+    Scenario(
+        "logout",
+        "logout",
+        "post",
+        "trader",
+        lambda f: Call(data={"refresh_token": f.refresh_token()}),
+    ),
+    Scenario(
+        "token-refresh",
+        "token-refresh",
+        "post",
+        None,
+        lambda f: Call(data={"refresh": f.refresh_token()}),
+    ),
+    Scenario("auth-cache-stats", "auth-cache-stats", "get", "staff", lambda f: Call()),
+    Scenario("category-list", "category-list", "get", "trader", lambda f: Call()),
+    Scenario(
+        "category-detail",
+        "category-detail",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"pk": f.category_id}),
+    ),
+    Scenario(
+        "product-list",
+        "add-product",
+        "get",
+        None,
+        lambda f: Call(query="page_size=50"),
+    ),
+    Scenario(
+        "low-stock-products", "low-stock-products", "get", "staff", lambda f: Call()
+    ),
+    Scenario(
+        "product-import",
+        "product-import",
+        "post",
+        "staff",
+        lambda f: Call(
+            data={"file": SimpleUploadedFile("products.csv", f.import_file)},
+            content_type=None,
+        ),
+    ),
+    Scenario("product-export", "product-export", "get", "staff", lambda f: Call()),
+    Scenario(
+        "product-detail",
+        "product-detail",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"product_id": f.product.product_id}),
+    ),
+    Scenario(
+        "create-payment-intent",
+        "create-payment-intent",
+        "post",
+        "trader",
+        lambda f: Call(data={"order_id": f.order.id}),
+    ),
+    Scenario(
+        "stripe-webhook",
+        "stripe-webhook",
+        "post",
+        None,
+        lambda f: f.webhook(),
+    ),
+    Scenario(
+        "fake-payment-confirm",
+        "fake-payment-confirm",
+        "post",
+        "trader",
+        lambda f: Call(
+            kwargs={"transaction_id": f.pending_transaction().id},
+            data={"outcome": "failed"},
+        ),
+    ),
+    Scenario("transaction-list", "transaction-list", "get", "trader", lambda f: Call()),
+    Scenario(
+        "transaction-export", "transaction-export", "get", "trader", lambda f: Call()
+    ),
+    Scenario(
+        "cancel-order",
+        "cancel-order",
+        "post",
+        "trader",
+        lambda f: Call(kwargs={"pk": f.pending_order().id}),
+    ),
+    Scenario(
+        "create-order",
+        "create-order",
+        "post",
+        "trader",
+        # A new quantity each time, so no pending order is reused
+        lambda f: Call(data={"items": f.cart_items(quantity=f.next() % 50 + 1)}),
+    ),
+    Scenario(
+        "order-payment-status",
+        "order-payment-status",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"pk": f.order.id}),
+    ),
+    Scenario("user-orders-list", "user-orders-list", "get", "trader", lambda f: Call()),
+    Scenario(
+        "user-orders-list:summary",
+        "user-orders-list",
+        "get",
+        "trader",
+        lambda f: Call(query="view=summary"),
+    ),
+    Scenario(
+        "user-orders-list:page",
+        "user-orders-list",
+        "get",
+        "trader",
+        lambda f: Call(query="page_size=20"),
+    ),
+    Scenario("order-export", "order-export", "get", "trader", lambda f: Call()),
+    Scenario(
+        "order-detail",
+        "order-detail",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"pk": f.order.id}),
+    ),
+    Scenario(
+        "verify-cart",
+        "verify-cart",
+        "post",
+        "trader",
+        lambda f: Call(
+            data={
+                "items": [
+                    {
+                        "product_id": product.product_id,
+                        "price_per_unit": str(product.price_per_unit),
+                    }
+                    for product in f.cart
+                ]
+            }
+        ),
+    ),
+    Scenario(
+        "sales-report",
+        "sales-report",
+        "get",
+        "staff",
+        lambda f: Call(query=f"by=category&from={f.report_from}&to={f.report_to}"),
+    ),
+    Scenario(
+        "sales-report:product",
+        "sales-report",
+        "get",
+        "staff",
+        lambda f: Call(query=f"by=product&from={f.report_from}&to={f.report_to}"),
+    ),
+    Scenario(
+        "async-product-list",
+        "async-product-list",
+        "get",
+        None,
+        lambda f: Call(query="page_size=50"),
+    ),
+    Scenario(
+        "async-product-detail",
+        "async-product-detail",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"product_id": f.product.product_id}),
+    ),
+    Scenario(
+        "async-category-list", "async-category-list", "get", "trader", lambda f: Call()
+    ),
+    Scenario(
+        "async-orders-list", "async-orders-list", "get", "trader", lambda f: Call()
+    ),
+    Scenario(
+        "async-order-detail",
+        "async-order-detail",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"pk": f.order.id}),
+    ),
+    Scenario(
+        "async-order-payment-status",
+        "async-order-payment-status",
+        "get",
+        "trader",
+        lambda f: Call(kwargs={"pk": f.order.id}),
+    ),
+)
+
+
+@contextmanager
+def count_queries(counter):
+    def wrapper(execute, sql, params, many, context):
+        counter["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+@contextmanager
+def count_rows(counter):
+    """
+    Count the rows returned by every fetch on Django's cursor wrappers.
+    They proxy fetch* through __getattr__, so class attributes take over.
+    """
+
+    def fetch(name, size):
+        def method(self, *args):
+            rows = self.db.wrap_database_errors(getattr(self.cursor, name))(*args)
+            counter["rows"] += size(rows)
+            return rows
+
+        return method
+
+    methods = {
+        "fetchone": fetch("fetchone", lambda row: row is not None),
+        "fetchmany": fetch("fetchmany", len),
+        "fetchall": fetch("fetchall", len),
+    }
+    for name, method in methods.items():
+        setattr(CursorWrapper, name, method)
+    try:
+        yield
+    finally:
+        for name in methods:
+            delattr(CursorWrapper, name)
+
+
+class Runner:
+    def __init__(self, fixtures, iterations=30, warmup=3, profile_runs=3):
+        self.fixtures = fixtures
+        self.iterations = iterations
+        self.warmup = warmup
+        self.profile_runs = profile_runs
+        self.client = Client(raise_request_exception=False)
+
+    @contextmanager
+    def environment(self):
+        # The fake gateway keeps payment scenarios offline; its webhooks are
+        # delivered through this process as "localhost"
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver", "localhost"],
+            PAYMENT_GATEWAY={
+                "BACKEND": "warehouse_app.payments.FakeGateway",
+                "OPTIONS": {"webhook_secret": WEBHOOK_SECRET},
+            },
+        ):
+            yield
+
+    def send(self, scenario):
+        """Send one request; return its status and seconds to the last byte."""
+        call = scenario.call(self.fixtures)
+        path = reverse(scenario.route, kwargs=call.kwargs)
+        if call.query:
+            path = f"{path}?{call.query}"
+        args = (path,) if scenario.method == "get" else (path, call.data)
+        options = dict(call.extra or {})
+        if call.content_type and scenario.method != "get":
+            options["content_type"] = call.content_type
+        send = getattr(self.client, scenario.method)
+        headers = self.fixtures.headers.get(scenario.auth, {})
+
+        started = time.perf_counter()
+        response = send(*args, headers=headers, **options)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.content
+        elapsed = time.perf_counter() - started
+        response.close()
+
+        # Webhooks emitted by the fake gateway must not overlap the next request
+        gateway = get_gateway()
+        if hasattr(gateway, "flush"):
+            gateway.flush()
+        return response.status_code, elapsed
+
+    def run(self, scenario):
+        self.fixtures.refresh_tokens()
+        for _ in range(self.warmup):
+            self.send(scenario)
+
+        statuses = Counter()
+        latencies = []
+        for _ in range(self.iterations):
+            status_code, elapsed = self.send(scenario)
+            statuses[status_code] += 1
+            latencies.append(elapsed * 1000)
+        latencies.sort()
+
+        costs = Counter()
+        peak = 0
+        tracemalloc.start()
+        try:
+            for _ in range(self.profile_runs):
+                counter = Counter()
+                with count_queries(counter), count_rows(counter):
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    self.send(scenario)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+                costs = costs | counter  # Keep the largest of each
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "route": scenario.route,
+            "method": scenario.method.upper(),
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+            "p50_ms": round(percentile(latencies, 0.5), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "max_ms": round(latencies[-1], 3),
+            "queries": costs["queries"],
+            "rows": costs["rows"],
+            "peak_memory_kib": round(peak / 1024, 1),
+        }
+
+    def run_all(self, scenarios, progress=None):
+        endpoints = {}
+        with self.environment():
+            for scenario in scenarios:
+                endpoints[scenario.name] = result = self.run(scenario)
+                if progress:
+                    progress(scenario.name, result)
+        return {"meta": self.meta(), "endpoints": endpoints}
+
+    def meta(self):
+        return {
+            "created": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "iterations": self.iterations,
+            "warmup": self.warmup,
+            "profile_runs": self.profile_runs,
+            "dataset": {
+                "products": Product.objects.count(),
+                "users": CustomUser.objects.count(),
+                "orders": Order.objects.count(),
+                "order_items": OrderItem.objects.count(),
+                "categories": Category.objects.count(),
+            },
+        }
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Regressions of ``results`` against an earlier run: p95 latency more
+    than ``threshold`` slower, or any extra SQL query per request.
+    """
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms"
+            )
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: {previous['queries']} -> {current['queries']} queries"
+            )
+    return regressions
@@ -0,0 +1,124 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import parse_etags
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_MODIFIED_KEY = "catalog:last_modified"
+
+
+def _reset_catalog_state():
+    # Seed from the clock so a version lost to eviction never reuses the
+    # keys of payloads cached under an earlier counter.
+    version, modified = time.time_ns(), int(time.time())
+    cache.set_many(
+        {CATALOG_VERSION_KEY: version, CATALOG_MODIFIED_KEY: modified}, timeout=None
+    )
+    return version, modified
+
+
+def get_catalog_state():
+    """Return the current ``(version, last_modified)`` of the catalog."""
+    values = cache.get_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    if CATALOG_VERSION_KEY not in values or CATALOG_MODIFIED_KEY not in values:
+        return _reset_catalog_state()
+    return values[CATALOG_VERSION_KEY], values[CATALOG_MODIFIED_KEY]
+
+
+async def aget_catalog_state():
+    values = await cache.aget_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    if CATALOG_VERSION_KEY not in values or CATALOG_MODIFIED_KEY not in values:
+        return await sync_to_async(_reset_catalog_state)()
+    return values[CATALOG_VERSION_KEY], values[CATALOG_MODIFIED_KEY]
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog payload."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        _reset_catalog_state()
+    else:
+        cache.set(CATALOG_MODIFIED_KEY, int(time.time()), timeout=None)
+
+
+def catalog_etag(version):
+    return f'W/"catalog-{version}"'
+
+
+def catalog_cache_key(request, version):
+    # Key on the absolute URI: the query string selects the page and image
+    # URLs in the payload embed the request host.
+    uri = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"catalog:{version}:{uri}"
+
+
+def is_not_modified(request, etag, modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return "*" in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(
+        request.headers.get("If-Modified-Since", "")
+    )
+    return if_modified_since is not None and modified <= if_modified_since
+
+
+def set_validators(response, version, modified):
+    response["ETag"] = catalog_etag(version)
+    response["Last-Modified"] = http_date(modified)
+    return response
+
+
+class CatalogCacheMixin:
+    """
+    Serve ``list``/``retrieve`` from payloads cached under the catalog
+    version, and answer conditional requests with 304 before rendering
+    anything; detail requests first check that their object exists. Writes
+    go through the usual view code; the model signals bump the version once
+    they commit.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, exists=self.object_exists, **kwargs
+        )
+
+    def object_exists(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            self.get_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .exists()
+        )
+
+    def cached_response(self, request, render, *args, exists=None, **kwargs):
+        version, modified = get_catalog_state()
+
+        # The ETag covers the whole catalog, so it also matches ids that
+        # aren't in it; those must still get their 404
+        if is_not_modified(request, catalog_etag(version), modified) and (
+            exists is None or exists()
+        ):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = catalog_cache_key(request, version)
+            data = cache.get(key)
+            if data is None:
+                response = render(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        return set_validators(response, version, modified)
@@ -0,0 +1,145 @@
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import OrderItem
+from .streaming import csv_lines, ndjson_lines
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_CHUNK_SIZE = 2000
+
+TRANSACTION_COLUMNS = [
+    "id",
+    "order_number",
+    "transaction_date",
+    "amount",
+    "currency",
+    "payment_status",
+    "stripe_payment_intent_id",
+]
+ORDER_COLUMNS = [
+    "order_number",
+    "order_date",
+    "order_status",
+    "payment_status",
+    "total_price",
+]
+ORDER_ITEM_COLUMNS = ["product_id", "product_name", "quantity", "price"]
+
+
+def _parse_bound(value, name, end=False):
+    # A bare date covers the whole day, so "to=2025-01-31" includes the 31st
+    # parse_datetime() also accepts bare dates, so try parse_date() first
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:  # Well formed but not a real date, e.g. 2025-02-30
+        day = moment = None
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    elif moment is None:
+        raise ValidationError(f"{name} must be an ISO 8601 date or datetime")
+    elif end:
+        moment += timedelta(microseconds=1)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_period(queryset, params, date_field, status_field="payment_status"):
+    """
+    Apply the ``from``/``to``/``status`` query parameters to a queryset.
+    Both bounds are inclusive. Raises ValidationError for bad values.
+    """
+    if params.get("from"):
+        start = _parse_bound(params["from"], "from")
+        queryset = queryset.filter(**{f"{date_field}__gte": start})
+    if params.get("to"):
+        end = _parse_bound(params["to"], "to", end=True)
+        queryset = queryset.filter(**{f"{date_field}__lt": end})
+
+    state = params.get("status")
+    if state:
+        choices = dict(queryset.model._meta.get_field(status_field).choices)
+        if state not in choices:
+            raise ValidationError(f"status must be one of {', '.join(choices)}")
+        queryset = queryset.filter(**{status_field: state})
+    return queryset
+
+
+def transaction_rows(queryset):
+    transactions = (
+        queryset.select_related("order")
+        .order_by("transaction_date", "id")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for transaction in transactions:
+        yield [
+            transaction.id,
+            transaction.order.order_number,
+            transaction.transaction_date,
+            transaction.amount,
+            transaction.currency,
+            transaction.payment_status,
+            transaction.stripe_payment_intent_id,
+        ]
+
+
+def export_transactions(queryset, file_format):
+    """Yield transactions as CSV/NDJSON lines, oldest first."""
+    rows = transaction_rows(queryset)
+    if file_format == "csv":
+        return csv_lines(TRANSACTION_COLUMNS, rows)
+    return ndjson_lines(dict(zip(TRANSACTION_COLUMNS, row)) for row in rows)
+
+
+def _orders_with_items(queryset):
+    # With a chunk_size, iterator() runs the prefetch once per chunk
+    items = OrderItem.objects.select_related("product").order_by("id")
+    return (
+        queryset.prefetch_related(Prefetch("items", queryset=items))
+        .order_by("order_date", "id")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def _order_values(order):
+    return [
+        order.order_number,
+        order.order_date,
+        order.order_status,
+        order.payment_status,
+        order.total_price,
+    ]
+
+
+def _item_values(item):
+    return [item.product_id, item.product.name, item.quantity, item.price]
+
+
+def _order_item_rows(queryset):
+    # CSV is flat: one row per item, repeating the order columns
+    for order in _orders_with_items(queryset):
+        order_values = _order_values(order)
+        for item in order.items.all():
+            yield order_values + _item_values(item)
+
+
+def _order_records(queryset):
+    for order in _orders_with_items(queryset):
+        record = dict(zip(ORDER_COLUMNS, _order_values(order)))
+        record["items"] = [
+            dict(zip(ORDER_ITEM_COLUMNS, _item_values(item)))
+            for item in order.items.all()
+        ]
+        yield record
+
+
+def export_orders(queryset, file_format):
+    """Yield orders with their items as CSV/NDJSON lines, oldest first."""
+    if file_format == "csv":
+        return csv_lines(ORDER_COLUMNS + ORDER_ITEM_COLUMNS, _order_item_rows(queryset))
+    return ndjson_lines(_order_records(queryset))
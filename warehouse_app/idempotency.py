@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def expired_before():
+    """Keys created before this moment are past IDEMPOTENCY_KEY_TTL."""
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+class _Discard(Exception):
+    """Roll back the claimed key and hand ``response`` to the client."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class IdempotencyMixin:
+    """
+    Replay the stored response when a client retries a request with the same
+    ``Idempotency-Key`` header. Only successful responses are stored, so a
+    retry after a validation or server error runs the request again. Keys
+    expire after IDEMPOTENCY_KEY_TTL.
+    """
+
+    def idempotent_response(self, request, fingerprint, handler):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler()
+
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} is too long"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            with transaction.atomic():
+                # Claim the key first: a concurrent retry blocks on the unique
+                # constraint until this request commits or rolls back.
+                try:
+                    with transaction.atomic():
+                        record = IdempotencyKey.objects.create(
+                            user=request.user,
+                            key=key,
+                            request_fingerprint=fingerprint,
+                            response_status=0,
+                            response_body={},
+                        )
+                except IntegrityError:
+                    record = IdempotencyKey.objects.select_for_update().get(
+                        user=request.user, key=key
+                    )
+                    if record.created_at >= expired_before():
+                        return self.replay(record, fingerprint)
+
+                    # The key has expired, so this is a new request: take
+                    # over the row instead of waiting for the prune
+                    record.request_fingerprint = fingerprint
+                    record.created_at = timezone.now()
+                    record.save(update_fields=["request_fingerprint", "created_at"])
+
+                response = handler()
+                if not status.is_success(response.status_code):
+                    raise _Discard(response)
+
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=["response_status", "response_body"])
+        except _Discard as discarded:
+            return discarded.response
+
+        return response
+
+    def replay(self, stored, fingerprint):
+        if stored.request_fingerprint != fingerprint:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} was already used for another request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(stored.response_body, status=stored.response_status)
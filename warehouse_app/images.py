@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import close_old_connections
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITION_DIR = "product_images/renditions"
+RENDITIONS = {
+    "thumb": (200, 200),
+    "medium": (800, 800),
+}
+WEBP_QUALITY = 80
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Store uploads under the SHA-256 of their content, so the same photo
+    uploaded twice ends up as one file.
+    """
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        digest = digest.hexdigest()
+        extension = posixpath.splitext(name)[1].lower()
+        name = posixpath.join(posixpath.dirname(name), digest[:2], digest + extension)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+def rendition_name(image_name, label):
+    # Content-addressed uploads are named after their digest, so renditions
+    # of identical photos share a name (and a file) as well.
+    stem = posixpath.splitext(posixpath.basename(image_name))[0]
+    return f"{RENDITION_DIR}/{stem}-{label}.webp"
+
+
+def renditions_current(product):
+    return not product.image or (
+        product.image_thumbnail.name == rendition_name(product.image.name, "thumb")
+        and product.image_medium.name == rendition_name(product.image.name, "medium")
+    )
+
+
+def _render_webp(image, size):
+    image = image.copy()
+    image.thumbnail(size)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    buffer = BytesIO()
+    image.save(buffer, "WEBP", quality=WEBP_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_renditions(product_id):
+    """Create the WebP renditions for a product's current image."""
+    from .catalog_cache import bump_catalog_version
+    from .models import Product
+
+    product = Product.objects.only("product_id", "image").filter(pk=product_id).first()
+    if product is None or not product.image:
+        return
+
+    source = product.image.name
+    names = {label: rendition_name(source, label) for label in RENDITIONS}
+    missing = [
+        label for label, name in names.items() if not default_storage.exists(name)
+    ]
+
+    if missing:
+        with product.image.open("rb") as image_file:
+            image = ImageOps.exif_transpose(Image.open(image_file))
+            image.load()
+        for label in missing:
+            saved = default_storage.save(
+                names[label], _render_webp(image, RENDITIONS[label])
+            )
+            if saved != names[label]:
+                # Another worker rendered the same image concurrently
+                default_storage.delete(saved)
+
+    # Skip the write if the image was replaced while we were rendering
+    updated = Product.objects.filter(pk=product_id, image=source).update(
+        image_thumbnail=names["thumb"], image_medium=names["medium"]
+    )
+    if updated:
+        bump_catalog_version()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                thread_name_prefix="renditions",
+            )
+        return _executor
+
+
+def _run_rendition_job(product_id):
+    try:
+        generate_renditions(product_id)
+    except Exception:
+        logger.exception("Generating renditions for product %s failed", product_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(product_id):
+    """Render a product's images on the worker pool, off the request path."""
+    return _get_executor().submit(_run_rendition_job, product_id)
@@ -0,0 +1,247 @@
+"""
+Per-request timing: SQL queries and database time, serializer time and
+total time, sent back in a ``Server-Timing`` header and aggregated into
+per-route histograms served in the Prometheus text format.
+
+Histograms are kept per worker process; Prometheus adds them up across
+workers when queried with ``sum by (le, route)``.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseNotFound
+from django.utils.crypto import constant_time_compare
+
+# Seconds; roughly doubling, from a cached read to a slow export
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Timings of the request being handled, None when instrumentation is off
+_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "serialize", "serializing")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db += time.perf_counter() - started
+
+
+def _install_query_timer(connection, **kwargs):
+    # Installed once per connection rather than per request: under ASGI,
+    # sync views query through the worker thread's own connection. First in
+    # line, so execute_wrapper() blocks still pop their own wrapper.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+class Histogram:
+    """A labelled Prometheus histogram kept in process memory."""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, series in sorted(snapshot.items()):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+REQUEST_LABELS = ("route", "method", "status")
+HISTOGRAMS = (
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to build the response.",
+        REQUEST_LABELS,
+        LATENCY_BUCKETS,
+    ),
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Time spent executing SQL per request.",
+        REQUEST_LABELS,
+        LATENCY_BUCKETS,
+    ),
+    Histogram(
+        "http_request_serializer_duration_seconds",
+        "Time spent in DRF serializers per request.",
+        REQUEST_LABELS,
+        LATENCY_BUCKETS,
+    ),
+    Histogram(
+        "http_request_db_queries",
+        "SQL queries per request.",
+        REQUEST_LABELS,
+        QUERY_BUCKETS,
+    ),
+)
+
+
+def expose_metrics():
+    return "\n".join(histogram.expose() for histogram in HISTOGRAMS) + "\n"
+
+
+class TimedSerializerMixin:
+    """
+    Add serializer time to the request's timings. Only the outermost
+    serializer is timed, so nested serializers aren't counted twice; the
+    time includes any queries that serialization triggers.
+    """
+
+    def to_representation(self, instance):
+        timings = _timings.get()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serialize += time.perf_counter() - started
+            timings.serializing = False
+
+
+class PerformanceMiddleware:
+    """
+    Time each request and record it in the histograms. Put it first in
+    MIDDLEWARE so the total covers the rest of the stack. Off by default;
+    when disabled it removes itself at startup, so it costs nothing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.PERFORMANCE_METRICS
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.server_timing = config["SERVER_TIMING"]
+        connection_created.connect(_install_query_timer)
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings, token, started = self.start()
+        try:
+            # Sync views run in a copy of this context, so they see the timings
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    def start(self):
+        timings = RequestTimings()
+        return timings, _timings.set(timings), time.perf_counter()
+
+    def finish(self, request, response, timings, started):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        labels = (
+            match.route if match else UNMATCHED_ROUTE,
+            request.method,
+            str(response.status_code),
+        )
+        for histogram, value in zip(
+            HISTOGRAMS, (total, timings.db, timings.serialize, timings.queries)
+        ):
+            histogram.observe(value, *labels)
+
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+                    f"serialize;dur={timings.serialize * 1000:.1f}",
+                    f"total;dur={total * 1000:.1f}",
+                ]
+            )
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for staff or holders of the bearer token."""
+    config = settings.PERFORMANCE_METRICS
+    if not config["ENABLED"]:
+        return HttpResponseNotFound()
+
+    token = config.get("TOKEN")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not request.user.is_staff and not (
+        token and constant_time_compare(supplied, token)
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+
+    return HttpResponse(
+        expose_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
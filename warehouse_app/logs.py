@@ -0,0 +1,185 @@
+"""
+Structured, non-blocking logging.
+
+Records are tagged with the current request id and handed to a queue;
+a listener thread formats them as JSON lines and does the I/O, so request
+threads never wait on the log stream. Configured through LOGGING in
+settings; nothing here touches models, since logging is set up before
+the apps are loaded.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Accept the caller's id (a proxy or another service) only if it is sane
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+_request_id = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed in ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id=None):
+    """Tag the records logged inside the block with ``request_id``."""
+    token = _request_id.set(request_id or uuid.uuid4().hex)
+    try:
+        yield _request_id.get()
+    finally:
+        _request_id.reset(token)
+
+
+class RequestIdMiddleware:
+    """
+    Give each request a correlation id, taken from the X-Request-ID header
+    when the caller sent a valid one, and echo it on the response.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_context(self.incoming_id(request)) as request_id:
+            request.request_id = request_id
+            response = self.get_response(request)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+    async def __acall__(self, request):
+        with request_context(self.incoming_id(request)) as request_id:
+            request.request_id = request_id
+            response = await self.get_response(request)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+    def incoming_id(self, request):
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        return request_id if _VALID_REQUEST_ID.match(request_id) else None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        request_id = _request_id.get()
+        if request_id is None:
+            # django.request logs the response after the middleware returns
+            request_id = getattr(getattr(record, "request", None), "request_id", None)
+        record.request_id = request_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only ``rate`` of the records at or below ``level`` (DEBUG by
+    default). The choice is made per request id, so a sampled request
+    keeps all of its debug records. Needs RequestIdFilter to run first.
+    """
+
+    def __init__(self, rate=1.0, level=logging.DEBUG):
+        super().__init__()
+        self.threshold = int(rate * 10000)
+        self.level = level if isinstance(level, int) else logging.getLevelName(level)
+
+    def filter(self, record):
+        if record.levelno > self.level or self.threshold >= 10000:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id is None:
+            return random.randrange(10000) < self.threshold
+        return zlib.crc32(request_id.encode()) % 10000 < self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any ``extra`` fields included."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, dt_timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Queue records for a listener thread that writes them to ``stream`` as
+    JSON lines. The queue is bounded; when the writer can't keep up,
+    records are dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, stream=sys.stderr, capacity=10000):
+        super().__init__(None)
+        self.capacity = capacity
+        self.target = logging.StreamHandler(stream)
+        self.target.setFormatter(JsonFormatter())
+        self.dropped = 0
+        self._start()
+        # Threads don't survive a fork; give each child its own listener
+        os.register_at_fork(after_in_child=self._restart)
+
+    def _start(self):
+        self.queue = queue.Queue(self.capacity)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def _restart(self):
+        if self.listener is not None:
+            self._start()
+
+    def prepare(self, record):
+        # Merge the args now, since they may change after we return, but
+        # leave exc_info for the listener so tracebacks are formatted there
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Runs from logging.shutdown() at exit: flush what is queued
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.target.close()
+        super().close()
@@ -0,0 +1,195 @@
+import asyncio
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from warehouse_app.benchmarks import percentile
+from warehouse_app.models import CustomUser, Order, Product
+
+API_PREFIX = "/api/accounts/"
+HOST = "localhost"
+# Endpoint name -> path under the API prefix; the async twin lives under async/
+ENDPOINTS = {
+    "products": "products/",
+    "product": "products/{product_id}/",
+    "categories": "categories/",
+    "orders": "orders/list/",
+    "order": "orders/{order_id}/",
+    "payment-status": "orders/{order_id}/payment-status/",
+}
+MODES = ("wsgi", "asgi-sync", "asgi-async")
+
+
+def wsgi_call(app, path, query, token):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "HTTP_HOST": HOST,
+        "HTTP_AUTHORIZATION": token,
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+    }
+    statuses = []
+    result = app(
+        environ, lambda status, headers, exc_info=None: statuses.append(status)
+    )
+    try:
+        for _ in result:
+            pass
+    finally:
+        result.close()  # Fires request_finished, which recycles connections
+    return int(statuses[0].split()[0])
+
+
+async def asgi_call(app, path, query, token):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", HOST.encode()), (b"authorization", token.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+    body_sent = False
+    statuses = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects; Django cancels this once it responds
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(scope, receive, send)
+    return statuses[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and tail latency of a read endpoint served by the "
+        "sync views under WSGI and ASGI and by the async views under ASGI. "
+        "Runs the handlers in process, so it measures the Django side only; "
+        "use a real server and load generator for deployment figures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=ENDPOINTS, default="order")
+        parser.add_argument("--query", default="", help="Query string to send")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--concurrency", type=int, default=100, help="Concurrent clients"
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8, help="WSGI worker threads"
+        )
+        parser.add_argument("--warmup", type=int, default=50)
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+        parser.add_argument("--email", help="User to authenticate as")
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["email"])
+        token = f"Bearer {AccessToken.for_user(user)}"
+        path = ENDPOINTS[options["endpoint"]].format(
+            product_id=self.first_id(Product.objects.order_by("product_id")),
+            order_id=self.first_id(Order.objects.filter(user=user).order_by("-id")),
+        )
+
+        self.stdout.write(
+            f"{options['endpoint']}: {options['requests']} requests, "
+            f"{options['concurrency']} clients, {options['threads']} WSGI threads"
+        )
+        self.stdout.write(
+            f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}  statuses"
+        )
+        for mode in options["modes"]:
+            full_path = API_PREFIX + ("async/" if mode == "asgi-async" else "") + path
+            result = asyncio.run(self.run_mode(mode, full_path, token, options))
+            self.report(mode, *result)
+
+    def get_user(self, email):
+        if email:
+            user = CustomUser.objects.filter(email=email).first()
+        else:
+            order = Order.objects.select_related("user").order_by("-id").first()
+            user = order.user if order else None
+        if user is None:
+            raise CommandError("No user to benchmark as, pass --email")
+        return user
+
+    def first_id(self, queryset):
+        return queryset.values_list("pk", flat=True).first() or 0
+
+    async def run_mode(self, mode, path, token, options):
+        query = options["query"]
+        if mode == "wsgi":
+            app = WSGIHandler()
+            server = ThreadPoolExecutor(max_workers=options["threads"])
+            loop = asyncio.get_running_loop()
+
+            def call():
+                return loop.run_in_executor(server, wsgi_call, app, path, query, token)
+
+        else:
+            app = ASGIHandler()
+
+            def call():
+                return asgi_call(app, path, query, token)
+
+        try:
+            await self.run_clients(call, options["warmup"], options["concurrency"])
+            return await self.run_clients(
+                call, options["requests"], options["concurrency"]
+            )
+        finally:
+            if mode == "wsgi":
+                server.shutdown()
+
+    async def run_clients(self, call, total, concurrency):
+        # Closed loop: each client sends its next request when the last returns
+        remaining = iter(range(total))
+        latencies = []
+        statuses = Counter()
+
+        async def client():
+            for _ in remaining:
+                start = time.perf_counter()
+                statuses[await call()] += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, sorted(latencies), statuses
+
+    def report(self, mode, elapsed, latencies, statuses):
+        if not latencies:
+            self.stdout.write(f"{mode:<12}no requests")
+            return
+        ms = [latency * 1000 for latency in latencies]
+        self.stdout.write(
+            f"{mode:<12}{len(ms) / elapsed:>10.0f}{percentile(ms, 0.5):>10.1f}"
+            f"{percentile(ms, 0.95):>10.1f}{percentile(ms, 0.99):>10.1f}  "
+            + ", ".join(f"{code}x{count}" for code, count in sorted(statuses.items()))
+        )
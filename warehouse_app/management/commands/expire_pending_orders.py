@@ -0,0 +1,80 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from warehouse_app.order_state import expire_pending_orders
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Cancel orders that have been awaiting payment for longer than the TTL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ttl",
+            type=int,
+            default=settings.PENDING_ORDER_TTL,
+            help="Seconds an order may stay pending (default: PENDING_ORDER_TTL)",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches to let other writers in",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, sweeping again every --interval seconds",
+        )
+        parser.add_argument("--interval", type=float, default=300)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        while True:
+            started = time.monotonic()
+            try:
+                expired, batches = self.sweep(
+                    timedelta(seconds=options["ttl"]),
+                    options["batch_size"],
+                    options["pause"],
+                )
+            except DatabaseError:
+                if not options["loop"]:
+                    raise
+                # Batches already committed stay expired; retry the rest later
+                logger.exception("Expiring pending orders failed")
+            else:
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Expired {expired} pending orders in {batches} batches, "
+                        f"{elapsed:.2f}s ({expired / elapsed:.0f} orders/s)"
+                    )
+                )
+            if not options["loop"]:
+                break
+            # Drop a connection the failure broke or the server has timed out
+            close_old_connections()
+            time.sleep(options["interval"])
+
+    def sweep(self, ttl, batch_size, pause):
+        placed_before = timezone.now() - ttl
+        expired = batches = 0
+        while True:
+            # Each batch is one short transaction
+            ids = expire_pending_orders(placed_before, batch_size)
+            expired += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                return expired, batches
+            time.sleep(pause)
@@ -0,0 +1,24 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from warehouse_app.product_io import FILE_FORMATS, export_products
+
+
+class Command(BaseCommand):
+    help = "Stream the product catalog to a CSV or JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", dest="file_format", choices=FILE_FORMATS, default="csv"
+        )
+        parser.add_argument("--output", help="Defaults to stdout")
+
+    def handle(self, *args, **options):
+        lines = export_products(options["file_format"])
+        if not options["output"]:
+            sys.stdout.writelines(lines)
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as output:
+            output.writelines(lines)
@@ -0,0 +1,30 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand
+
+from warehouse_app.replenishment import purchase_order_drafts
+
+
+class Command(BaseCommand):
+    help = "Draft purchase orders, one per category, for products below threshold"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Defaults to stdout")
+
+    def handle(self, *args, **options):
+        drafts = purchase_order_drafts()
+        document = json.dumps(drafts, cls=DjangoJSONEncoder, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.write(document + "\n")
+        else:
+            self.stdout.write(document)
+
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Drafted {len(drafts)} purchase orders for "
+                f"{sum(len(draft['lines']) for draft in drafts)} products"
+            )
+        )
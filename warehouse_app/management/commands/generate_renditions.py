@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from warehouse_app.images import generate_renditions, renditions_current
+from warehouse_app.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generate missing WebP renditions for product images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rehash",
+            action="store_true",
+            help="Move images uploaded before content-addressed storage to "
+            "their content hash so duplicates share one file",
+        )
+
+    def handle(self, *args, **options):
+        products = (
+            Product.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .only("product_id", "image", "image_thumbnail", "image_medium")
+        )
+
+        rendered = 0
+        for product in products.iterator(chunk_size=500):
+            if options["rehash"]:
+                self.rehash(product)
+
+            if not renditions_current(product):
+                generate_renditions(product.pk)
+                rendered += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rendered images for {rendered} products")
+        )
+
+    def rehash(self, product):
+        legacy = product.image.name
+        storage = product.image.storage
+        stored = storage.save(legacy, product.image)
+        product.image.close()
+        if stored == legacy:
+            return
+
+        with transaction.atomic():
+            Product.objects.filter(pk=product.pk).update(image=stored)
+            transaction.on_commit(lambda: self.delete_unreferenced(storage, legacy))
+        product.image.name = stored
+
+    def delete_unreferenced(self, storage, name):
+        # Rows copied from the same upload may still point at the old file
+        if not Product.objects.filter(image=name).exists():
+            storage.delete(name)
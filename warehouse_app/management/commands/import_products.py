@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouse_app.product_io import FILE_FORMATS, file_format_for, import_products
+
+
+class Command(BaseCommand):
+    help = "Upsert products from a CSV or JSONL file, keyed on supplier SKU"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=FILE_FORMATS,
+            help="Defaults to the file extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["file_format"] or file_format_for(path, default=None)
+        if file_format is None:
+            raise CommandError("Can't tell the file format, pass --format")
+
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = import_products(stream, file_format, options["batch_size"])
+
+        for error in result.errors:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.imported} products, rejected {result.rejected} rows"
+            )
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from warehouse_app.webhooks import MAX_ATTEMPTS, process_webhook_batch
+
+
+class Command(BaseCommand):
+    help = "Process Stripe webhook events recorded in the inbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the inbox instead of exiting once it is drained",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the inbox is empty",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            attempted = process_webhook_batch(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+            )
+            total += attempted
+            if attempted:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} webhook events"))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from warehouse_app.idempotency import expired_before
+from warehouse_app.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records past IDEMPOTENCY_KEY_TTL in small chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between chunks to let other writers in",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, pruning again every --interval seconds",
+        )
+        parser.add_argument("--interval", type=float, default=3600)
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.prune(options["chunk_size"], options["pause"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Pruned {deleted} expired idempotency keys")
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def prune(self, chunk_size, pause):
+        cutoff = expired_before()
+        deleted = 0
+        while True:
+            # Keys are created in primary key order, so the expired ones come
+            # first and each chunk stops before the live part of the table.
+            ids = list(
+                IdempotencyKey.objects.filter(created_at__lt=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                return deleted
+
+            # Each chunk is its own short transaction
+            IdempotencyKey.objects.filter(id__in=ids, created_at__lt=cutoff).delete()
+            deleted += len(ids)
+            time.sleep(pause)
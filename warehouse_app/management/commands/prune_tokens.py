@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted tokens in small chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between chunks to let other writers in",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, pruning again every --interval seconds",
+        )
+        parser.add_argument("--interval", type=float, default=3600)
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.prune(options["chunk_size"], options["pause"])
+            self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired tokens"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def prune(self, chunk_size, pause):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # Expired tokens are the oldest ones, so walking the primary key
+            # finds them without scanning the live part of the table.
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                return deleted
+
+            # Each chunk is its own short transaction
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            time.sleep(pause)
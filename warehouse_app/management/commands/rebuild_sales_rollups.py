@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from warehouse_app.models import Order
+from warehouse_app.rollups import rebuild_rollups
+
+
+def _date(value):
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollups from orders, a few days at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from", dest="first_day", type=_date, help="Defaults to the first order"
+        )
+        parser.add_argument(
+            "--to", dest="last_day", type=_date, help="Defaults to today"
+        )
+        parser.add_argument("--chunk-days", type=int, default=7)
+
+    def handle(self, *args, **options):
+        last_day = options["last_day"] or timezone.localdate()
+        first_day = options["first_day"]
+        if first_day is None:
+            first_order = Order.objects.aggregate(first=Min("order_date"))["first"]
+            if first_order is None:
+                self.stdout.write("No orders to roll up")
+                return
+            first_day = timezone.localdate(first_order)
+        if first_day > last_day:
+            raise CommandError("--from is after --to")
+
+        # Each chunk is rebuilt in its own transaction
+        chunk = timedelta(days=options["chunk_days"])
+        start = first_day
+        while start <= last_day:
+            end = min(start + chunk - timedelta(days=1), last_day)
+            rows = rebuild_rollups(start, end)
+            self.stdout.write(f"{start}..{end}: {rows} rollup rows")
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS("Sales rollups rebuilt"))
@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouse_app.benchmarks import SCENARIOS, Fixtures, Runner, compare
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API route against the seed_benchmark_data dataset and "
+        "report p50/p95/p99 latency, SQL queries, rows fetched and peak memory "
+        "per request. Results are JSON and can be compared with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--profile-runs",
+            type=int,
+            default=3,
+            help="Instrumented requests per scenario for queries, rows and memory",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            metavar="SCENARIO",
+            choices=[scenario.name for scenario in SCENARIOS],
+        )
+        parser.add_argument("--output", help="Write the results as JSON here")
+        parser.add_argument("--baseline", help="Results of an earlier run")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed p95 slowdown against the baseline (0.2 = 20%%)",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if any scenario regressed",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1 or options["profile_runs"] < 1:
+            raise CommandError("--iterations and --profile-runs must be positive")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+
+        try:
+            fixtures = Fixtures()
+        except LookupError as e:
+            raise CommandError(str(e))
+        scenarios = [
+            scenario
+            for scenario in SCENARIOS
+            if not options["only"] or scenario.name in options["only"]
+        ]
+
+        self.stdout.write(
+            f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'rows':>9}{'peak KiB':>10}  statuses"
+        )
+        runner = Runner(
+            fixtures,
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            profile_runs=options["profile_runs"],
+        )
+        results = runner.run_all(scenarios, progress=self.report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(results, output, indent=2)
+                output.write("\n")
+
+        if baseline is None:
+            return
+        regressions = compare(results, baseline, options["threshold"])
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(regression))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+        elif options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} regressions against the baseline")
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<28}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{result['queries']:>9}{result['rows']:>9}"
+            f"{result['peak_memory_kib']:>10.0f}  "
+            + ", ".join(f"{code}x{count}" for code, count in result["statuses"].items())
+        )
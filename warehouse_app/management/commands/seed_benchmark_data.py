@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouse_app.benchmark_data import FULL_SCALE, Seeder, is_seeded
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with the deterministic benchmark dataset: "
+        + ", ".join(f"{count:,} {name}" for name, count in FULL_SCALE.items())
+        + " at --scale 1. Use a dedicated database; run_benchmarks writes to it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", type=float, default=1.0, help="Fraction of the full row counts"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["scale"] <= 0:
+            raise CommandError("--scale must be positive")
+        if is_seeded():
+            raise CommandError("Benchmark data is already loaded")
+
+        seeder = Seeder(
+            scale=options["scale"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        )
+        sizes = seeder.run()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded "
+                + ", ".join(f"{count:,} {name}" for name, count in sizes.items())
+            )
+        )
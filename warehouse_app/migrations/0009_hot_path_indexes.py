@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0008_alter_order_payment_status_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "payment_status", "order_status"],
+                name="order_user_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(
+                    ("order_status", "pending"), ("payment_status", "pending")
+                ),
+                fields=["user"],
+                name="order_user_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-order_date"], name="order_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "-transaction_date"], name="transaction_user_date_idx"
+            ),
+        ),
+    ]
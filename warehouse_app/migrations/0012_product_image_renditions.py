@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:35
+
+import warehouse_app.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0011_webhook_event"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="image_medium",
+            field=models.ImageField(
+                blank=True, editable=False, max_length=255, null=True, upload_to=""
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="image_thumbnail",
+            field=models.ImageField(
+                blank=True, editable=False, max_length=255, null=True, upload_to=""
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=warehouse_app.images.ContentAddressedStorage(),
+                upload_to="product_images/",
+            ),
+        ),
+    ]
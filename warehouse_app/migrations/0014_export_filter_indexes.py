@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0013_product_sku"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "order_status", "order_date"],
+                name="order_user_state_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "payment_status", "transaction_date"],
+                name="transaction_user_status_idx",
+            ),
+        ),
+    ]
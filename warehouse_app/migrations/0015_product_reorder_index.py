@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0014_export_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(
+                    ("stock_quantity__lte", models.F("reorder_threshold"))
+                ),
+                fields=["category", "product_id"],
+                name="product_reorder_idx",
+            ),
+        ),
+    ]
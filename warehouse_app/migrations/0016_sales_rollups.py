@@ -0,0 +1,96 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0015_product_reorder_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategorySalesDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("units_sold", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("cancelled_units", models.PositiveIntegerField(default=0)),
+                (
+                    "cancelled_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("cancelled_orders", models.PositiveIntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="warehouse_app.category",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "category"), name="unique_category_sales_day"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductSalesDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("units_sold", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("cancelled_units", models.PositiveIntegerField(default=0)),
+                (
+                    "cancelled_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("cancelled_orders", models.PositiveIntegerField(default=0)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="warehouse_app.product",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "product"), name="unique_product_sales_day"
+                    )
+                ],
+            },
+        ),
+    ]
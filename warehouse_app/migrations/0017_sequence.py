@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 22:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0016_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Sequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("next_value", models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0017_sequence"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(
+                    ("order_status", "pending"), ("payment_status", "pending")
+                ),
+                fields=["order_date"],
+                name="order_pending_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("warehouse_app", "0018_order_pending_date_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["order_date"], name="order_date_idx"),
+        ),
+    ]
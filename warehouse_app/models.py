@@ -6,8 +6,12 @@ from django.contrib.auth.models import (
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+import copy
 import phonenumbers
 
+from .images import ContentAddressedStorage
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, username, password=None, **extra_fields):
@@ -26,7 +30,64 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, username, password, **extra_fields)
 
 
-class CustomUser(AbstractBaseUser, PermissionsMixin):
+class DirtyFieldsMixin:
+    """
+    Remember the column values loaded from the database so ``save()`` can
+    write only the fields that changed since (plus ``auto_now`` fields).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is None or not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                self._loaded_values[field.attname] = copy.deepcopy(
+                    getattr(self, field.attname)
+                )
+
+    def get_dirty_fields(self):
+        """Names of the fields changed since load, or None for new objects."""
+        if self._state.adding or not hasattr(self, "_loaded_values"):
+            return None
+        deferred = self.get_deferred_fields()
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+            and (
+                field.attname not in self._loaded_values
+                or self._loaded_values[field.attname] != getattr(self, field.attname)
+            )
+        ]
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(fields)
+
+    def save(self, *args, **kwargs):
+        if kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                kwargs["update_fields"] = dirty + [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if getattr(field, "auto_now", False) and field.name not in dirty
+                ]
+        super().save(*args, **kwargs)
+        # Fields left out of update_fields still differ from the database
+        self._snapshot(kwargs.get("update_fields"))
+
+
+class CustomUser(DirtyFieldsMixin, AbstractBaseUser, PermissionsMixin):
     # Role choices
     ROLE_CHOICES = (
         ("admin", "Admin"),
@@ -64,9 +125,52 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
                 )
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        update_fields = kwargs.get("update_fields")
+        changed = (
+            self.get_dirty_fields()
+            if update_fields is None
+            else [self._meta.get_field(name).name for name in update_fields]
+        )
+        if changed is None:
+            self.full_clean()
+        else:
+            self.clean_changed(changed)
         super().save(*args, **kwargs)
 
+    def clean_changed(self, changed):
+        """
+        full_clean() limited to the validators that can be affected by the
+        ``changed`` fields, so e.g. a last_login update runs no unique checks
+        and doesn't re-parse contact_info.
+        """
+        if not changed:
+            return
+        exclude = {
+            field.name
+            for field in self._meta.concrete_fields
+            if field.name not in changed
+        }
+
+        errors = {}
+        try:
+            self.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        if {self.USERNAME_FIELD, "contact_info"} & set(changed):
+            try:
+                self.clean()
+            except ValidationError as e:
+                errors = e.update_error_dict(errors)
+
+        try:
+            self.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        if errors:
+            raise ValidationError(errors)
+
     def __str__(self):
         return self.email
 
@@ -79,8 +183,17 @@ class Category(models.Model):
         return self.category_name
 
 
+class ProductQuerySet(models.QuerySet):
+    def needing_reorder(self):
+        # Matches the predicate of product_reorder_idx, so this reads the
+        # partial index instead of scanning the catalog
+        return self.filter(stock_quantity__lte=models.F("reorder_threshold"))
+
+
 class Product(models.Model):
     product_id = models.AutoField(primary_key=True)
+    # Supplier SKU, the key for bulk imports
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=255)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     stock_quantity = models.IntegerField()
@@ -88,13 +201,44 @@ class Product(models.Model):
     reorder_threshold = models.PositiveIntegerField()
     reorder_quantity = models.PositiveIntegerField()
     image = models.ImageField(
-        upload_to="product_images/", null=True, blank=True
+        upload_to="product_images/",
+        storage=ContentAddressedStorage(),
+        null=True,
+        blank=True,
     )  # Image Field
+    # WebP renditions generated from `image` by the rendition workers
+    image_thumbnail = models.ImageField(
+        max_length=255, null=True, blank=True, editable=False
+    )
+    image_medium = models.ImageField(
+        max_length=255, null=True, blank=True, editable=False
+    )
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Holds only the products at or below their reorder threshold;
+            # the database keeps it current on every stock write
+            models.Index(
+                fields=["category", "product_id"],
+                condition=models.Q(stock_quantity__lte=models.F("reorder_threshold")),
+                name="product_reorder_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        return self.prefetch_related("items")
+
+    def with_item_count(self):
+        return self.annotate(item_count=models.Count("items"))
+
+
 class Order(models.Model):
     ORDER_STATUS_CHOICES = [
         ("pending", "Pending"),
@@ -121,6 +265,39 @@ class Order(models.Model):
         choices=PAYMENT_STATUS_CHOICES,
         default="pending",
     )
+    # Canonical hash of the order lines, used to reuse a pending order
+    cart_fingerprint = models.CharField(max_length=64, blank=True, default="")
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Pending-order lookup in CreateOrderView
+            models.Index(
+                fields=["user", "payment_status", "order_status"],
+                name="order_user_status_idx",
+            ),
+            models.Index(
+                fields=["user", "cart_fingerprint"],
+                condition=models.Q(order_status="pending", payment_status="pending"),
+                name="order_pending_fingerprint_idx",
+            ),
+            # Oldest abandoned checkouts, for the expire_pending_orders sweep
+            models.Index(
+                fields=["order_date"],
+                condition=models.Q(order_status="pending", payment_status="pending"),
+                name="order_pending_date_idx",
+            ),
+            # Order history, newest first
+            models.Index(fields=["user", "-order_date"], name="order_user_date_idx"),
+            # Date-range scans when rebuilding the sales rollups
+            models.Index(fields=["order_date"], name="order_date_idx"),
+            # Status-filtered order history and exports
+            models.Index(
+                fields=["user", "order_status", "order_date"],
+                name="order_user_state_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number} - {self.user.email}"
@@ -164,5 +341,130 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-transaction_date"], name="transaction_user_date_idx"
+            ),
+            # Status-filtered transaction history and exports
+            models.Index(
+                fields=["user", "payment_status", "transaction_date"],
+                name="transaction_user_status_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Transaction {self.id} - Order {self.order.id} - {self.payment_status}"
+
+
+class IdempotencyKey(models.Model):
+    """Response stored for a client-supplied ``Idempotency-Key`` header."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} - {self.user_id}"
+
+
+class WebhookEvent(models.Model):
+    """Stripe event recorded by the webhook endpoint for the inbox worker."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processed", "Processed"),
+        ("failed", "Failed"),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payment_intent_id = models.CharField(max_length=255, blank=True, default="")
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    event_created = models.DateTimeField()  # When Stripe created the event
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Due events for the inbox worker
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="webhook_event_due_idx",
+            ),
+            models.Index(
+                fields=["payment_intent_id", "event_created"],
+                name="webhook_event_intent_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} - {self.status}"
+
+
+class SalesRollup(models.Model):
+    """Daily sales counters, bucketed by the local date of the order."""
+
+    day = models.DateField()
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    cancelled_units = models.PositiveIntegerField(default=0)
+    cancelled_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ProductSalesDaily(SalesRollup):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "product"], name="unique_product_sales_day"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}"
+
+
+class CategorySalesDaily(SalesRollup):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "category"], name="unique_category_sales_day"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} on {self.day}"
+
+
+class Sequence(models.Model):
+    """A named counter, reserved in blocks by ``sequences.BlockAllocator``."""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} at {self.next_value}"
@@ -0,0 +1,100 @@
+"""
+The order state machine.
+
+An order's state is its (order_status, payment_status) pair. Every
+transition is one conditional UPDATE that only matches orders still in one
+of its source states, so when a cancellation and a payment race, exactly
+one of them applies and the other sees that nothing moved. Transitions
+take a queryset, so one statement can move any number of orders.
+"""
+
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Order, Transaction
+from .rollups import record_cancellations
+
+OrderState = namedtuple("OrderState", ["order_status", "payment_status"])
+
+PENDING = OrderState("pending", "pending")
+PAYMENT_FAILED = OrderState("pending", "failed")
+PAID = OrderState("processed", "paid")
+CANCELLED = OrderState("cancelled", "cancelled")
+
+
+class Transition(namedtuple("Transition", ["name", "sources", "target"])):
+    @property
+    def q(self):
+        """Matches the orders this transition can move."""
+        return reduce(or_, (Q(**state._asdict()) for state in self.sources))
+
+
+# A failed payment can be retried; stock is only taken once an order is paid
+PAY = Transition("pay", (PENDING, PAYMENT_FAILED), PAID)
+FAIL_PAYMENT = Transition("fail_payment", (PENDING, PAYMENT_FAILED), PAYMENT_FAILED)
+CANCEL = Transition("cancel", (PENDING, PAYMENT_FAILED), CANCELLED)
+
+
+def apply_transition(transition, orders):
+    """
+    Move the orders of ``orders`` (a queryset, which may be sliced) that are
+    in one of the transition's source states to its target state, in one
+    UPDATE ... RETURNING. Returns the ids of the orders that moved.
+    """
+    if not orders.query.is_sliced:
+        orders = orders.order_by()
+    connection = connections[orders.db]
+    subquery, params = orders.values("pk").query.get_compiler(orders.db).as_sql()
+
+    quote = connection.ops.quote_name
+    order_status = quote(Order._meta.get_field("order_status").column)
+    payment_status = quote(Order._meta.get_field("payment_status").column)
+    pk = quote(Order._meta.pk.column)
+    guard = " OR ".join(
+        [f"({order_status} = %s AND {payment_status} = %s)"] * len(transition.sources)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(Order._meta.db_table)} "
+            f"SET {order_status} = %s, {payment_status} = %s "
+            f"WHERE {pk} IN ({subquery}) AND ({guard}) "
+            f"RETURNING {pk}",
+            [
+                *transition.target,
+                *params,
+                *(status for state in transition.sources for status in state),
+            ],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def cancel_orders(orders):
+    """
+    Cancel the cancellable orders of ``orders``, fail their open payments
+    and count them in the cancellation rollups. Returns the cancelled ids.
+    """
+    with transaction.atomic(using=orders.db):
+        cancelled = apply_transition(CANCEL, orders)
+        if cancelled:
+            Transaction.objects.using(orders.db).filter(
+                order_id__in=cancelled, payment_status="pending"
+            ).update(payment_status="failed", updated_at=timezone.now())
+            record_cancellations(cancelled)
+    return cancelled
+
+
+def expire_pending_orders(placed_before, batch_size):
+    """
+    Cancel up to ``batch_size`` of the oldest orders still awaiting payment
+    that were placed before ``placed_before``. Returns their ids.
+    """
+    return cancel_orders(
+        Order.objects.filter(
+            order_date__lt=placed_before, **PENDING._asdict()
+        ).order_by("order_date")[:batch_size]
+    )
@@ -0,0 +1,34 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Keyset pagination that only kicks in when the client asks for it by
+    sending ``cursor`` or ``page_size``. Plain requests keep receiving the
+    full list so existing clients are unaffected.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (
+            self.cursor_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+# Product catalog pages are keyed on the primary key, so each page is a
+# "product_id > last_seen LIMIT n" index range scan instead of an OFFSET.
+class ProductCursorPagination(OptionalCursorPagination):
+    ordering = "product_id"
+
+
+# Order history pages newest first; id breaks ties between orders placed
+# in the same instant.
+class OrderCursorPagination(OptionalCursorPagination):
+    ordering = ("-order_date", "-id")
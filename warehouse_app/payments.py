@@ -0,0 +1,244 @@
+import hashlib
+import hmac
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from io import BytesIO
+from urllib import request as urllib_request
+
+import stripe
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from .logs import REQUEST_ID_HEADER, get_request_id, request_context
+
+logger = logging.getLogger(__name__)
+
+PaymentIntent = namedtuple("PaymentIntent", ["id", "client_secret"])
+
+
+class PaymentGatewayError(Exception):
+    """The gateway failed or timed out; safe to show to the client."""
+
+
+class PaymentGateway(ABC):
+    """
+    What the checkout views need from a payment provider. Webhooks use
+    Stripe's signature scheme whichever gateway is configured.
+    """
+
+    def __init__(self, webhook_secret):
+        self.webhook_secret = webhook_secret
+
+    @abstractmethod
+    def create_payment_intent(self, amount, currency, metadata):
+        """Create an intent for ``amount`` in minor units; return a PaymentIntent."""
+
+    def construct_event(self, payload, signature):
+        """Verify a webhook delivery and return its event."""
+        return stripe.Webhook.construct_event(payload, signature, self.webhook_secret)
+
+
+class StripeGateway(PaymentGateway):
+    """
+    Stripe over a shared keep-alive connection pool, with strict timeouts
+    and a bounded number of retries. Stripe adds an idempotency key to
+    retried POSTs, so a retry never creates a second intent.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        webhook_secret,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_network_retries=2,
+        pool_size=10,
+    ):
+        super().__init__(webhook_secret)
+        session = Session()
+        # Block instead of opening extra connections when the pool is busy
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        session.mount("https://", adapter)
+        self.client = stripe.StripeClient(
+            api_key,
+            http_client=stripe.RequestsClient(
+                timeout=(connect_timeout, read_timeout), session=session
+            ),
+            max_network_retries=max_network_retries,
+        )
+
+    def create_payment_intent(self, amount, currency, metadata):
+        try:
+            intent = self.client.v1.payment_intents.create(
+                params={
+                    "amount": amount,
+                    "currency": currency,
+                    "metadata": metadata,
+                    "automatic_payment_methods": {"enabled": True},
+                }
+            )
+        except stripe.StripeError as e:
+            raise PaymentGatewayError(e.user_message or str(e)) from e
+        return PaymentIntent(intent.id, intent.client_secret)
+
+
+class FakeGateway(PaymentGateway):
+    """
+    In-process stand-in for Stripe, for local development and offline load
+    tests. Intents are created without any network call; confirming one
+    emits a signed ``payment_intent.*`` webhook, delivered on a worker
+    thread to ``webhook_url`` or, by default, through this process's own
+    WSGI handler so it takes the same path as a real delivery.
+    """
+
+    def __init__(
+        self,
+        webhook_secret,
+        webhook_url=None,
+        webhook_host="localhost",  # Must be in ALLOWED_HOSTS
+        delivery_workers=4,
+    ):
+        super().__init__(webhook_secret)
+        self.webhook_url = webhook_url
+        self.webhook_host = webhook_host
+        self._executor = ThreadPoolExecutor(
+            max_workers=delivery_workers, thread_name_prefix="fake-webhooks"
+        )
+        self._handler = None
+        self._handler_lock = threading.Lock()
+        self._deliveries = set()
+
+    def create_payment_intent(self, amount, currency, metadata):
+        intent_id = f"pi_fake_{uuid.uuid4().hex[:24]}"
+        return PaymentIntent(intent_id, f"{intent_id}_secret_{uuid.uuid4().hex[:24]}")
+
+    def confirm_payment_intent(self, intent_id, succeeded=True, **data):
+        """
+        Settle an intent as the customer's payment would, and deliver the
+        resulting webhook. Returns the event id and a future for the
+        delivery's HTTP status.
+        """
+        event_type = (
+            "payment_intent.succeeded" if succeeded else "payment_intent.payment_failed"
+        )
+        event = {
+            "id": f"evt_fake_{uuid.uuid4().hex[:24]}",
+            "object": "event",
+            "type": event_type,
+            "created": int(time.time()),
+            "livemode": False,
+            "data": {
+                "object": {
+                    **data,
+                    "id": intent_id,
+                    "object": "payment_intent",
+                    "status": "succeeded" if succeeded else "requires_payment_method",
+                }
+            },
+        }
+        payload = json.dumps(event)
+        delivery = self._executor.submit(
+            self._deliver,
+            payload,
+            self.sign(payload, int(time.time())),
+            get_request_id(),
+        )
+        self._deliveries.add(delivery)
+        delivery.add_done_callback(self._deliveries.discard)
+        return event["id"], delivery
+
+    def flush(self, timeout=None):
+        """Wait for the webhooks queued so far to be delivered."""
+        wait(list(self._deliveries), timeout=timeout)
+
+    def sign(self, payload, timestamp):
+        signed = f"{timestamp}.{payload}".encode()
+        digest = hmac.new(self.webhook_secret.encode(), signed, hashlib.sha256)
+        return f"t={timestamp},v1={digest.hexdigest()}"
+
+    def _deliver(self, payload, signature, request_id):
+        # The webhook request continues the confirming request's id
+        headers = {"Stripe-Signature": signature}
+        if request_id:
+            headers[REQUEST_ID_HEADER] = request_id
+        with request_context(request_id):
+            try:
+                if self.webhook_url:
+                    return self._post(payload, headers)
+                return self._call_handler(payload, headers)
+            except Exception:
+                logger.exception("Fake webhook delivery failed")
+                raise
+
+    def _post(self, payload, headers):
+        delivery = urllib_request.Request(
+            self.webhook_url,
+            data=payload.encode(),
+            headers={"Content-Type": "application/json", **headers},
+        )
+        with urllib_request.urlopen(delivery, timeout=10) as response:
+            return response.status
+
+    def _call_handler(self, payload, headers):
+        # Imported late: the handler loads the URLconf, which imports views
+        from django.core.handlers.wsgi import WSGIHandler
+
+        with self._handler_lock:
+            if self._handler is None:
+                self._handler = WSGIHandler()
+
+        body = payload.encode()
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": reverse("stripe-webhook"),
+            "QUERY_STRING": "",
+            "SERVER_NAME": self.webhook_host,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": self.webhook_host,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+        }
+        for name, value in headers.items():
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+        statuses = []
+        response = self._handler(
+            environ, lambda status, headers, exc_info=None: statuses.append(status)
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()  # Fires request_finished, which recycles connections
+        return int(statuses[0].split()[0])
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """The gateway configured by ``settings.PAYMENT_GATEWAY``, built once."""
+    config = settings.PAYMENT_GATEWAY
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+def _reset_gateway(setting, **kwargs):
+    if setting == "PAYMENT_GATEWAY":
+        get_gateway.cache_clear()
+
+
+setting_changed.connect(_reset_gateway)
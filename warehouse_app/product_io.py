@@ -0,0 +1,259 @@
+import csv
+import json
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .catalog_cache import bump_catalog_version
+from .models import Category, Product
+from .streaming import csv_lines, ndjson_lines
+
+FILE_FORMATS = ("csv", "jsonl")
+# Columns of an import/export file
+COLUMNS = [
+    "sku",
+    "name",
+    "category",
+    "stock_quantity",
+    "price_per_unit",
+    "reorder_threshold",
+    "reorder_quantity",
+]
+# Product fields written by an import, in COPY/INSERT column order
+IMPORT_FIELDS = [
+    "sku",
+    "name",
+    "category_id",
+    "stock_quantity",
+    "price_per_unit",
+    "reorder_threshold",
+    "reorder_quantity",
+]
+MAX_REPORTED_ERRORS = 100
+PRICE_QUANTUM = Decimal("0.01")
+MAX_PRICE = Decimal("99999999.99")  # max_digits=10, decimal_places=2
+MAX_COUNT = 2**31 - 1  # Largest value of an integer column
+
+ImportResult = namedtuple("ImportResult", ["imported", "rejected", "errors"])
+
+
+class RowError(Exception):
+    pass
+
+
+class ErrorLog:
+    """Counts every rejected row but keeps only the first few messages."""
+
+    def __init__(self, limit=MAX_REPORTED_ERRORS):
+        self.limit = limit
+        self.count = 0
+        self.entries = []
+
+    def add(self, line_number, message):
+        self.count += 1
+        if len(self.entries) < self.limit:
+            self.entries.append({"line": line_number, "error": message})
+
+
+def file_format_for(filename, default="csv"):
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    return default
+
+
+def read_rows(stream, file_format):
+    """Yield ``(line_number, row)`` pairs from a CSV or JSONL text stream."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+def _text(row, column, max_length):
+    value = str(row.get(column) or "").strip()
+    if not value:
+        raise RowError(f"{column} is required")
+    if len(value) > max_length:
+        raise RowError(f"{column} is longer than {max_length} characters")
+    return value
+
+
+def _count(row, column):
+    try:
+        value = int(str(row.get(column, "")).strip())
+    except ValueError:
+        raise RowError(f"{column} must be a whole number")
+    if value < 0:
+        raise RowError(f"{column} can't be negative")
+    if value > MAX_COUNT:
+        raise RowError(f"{column} is out of range")
+    return value
+
+
+def _price(row):
+    try:
+        value = Decimal(str(row.get("price_per_unit", "")).strip()).quantize(
+            PRICE_QUANTUM
+        )
+    except InvalidOperation:
+        raise RowError("price_per_unit must be a decimal number")
+    if not value.is_finite() or not Decimal(0) <= value <= MAX_PRICE:
+        raise RowError("price_per_unit is out of range")
+    return value
+
+
+def validate_rows(rows, errors):
+    """
+    Turn raw rows into product field dicts, keyed by category name until the
+    category map resolves them. Invalid rows are skipped and recorded in the
+    ``errors`` ErrorLog.
+    """
+    for line_number, row in rows:
+        try:
+            if not isinstance(row, dict):
+                raise RowError("not a valid record")
+            yield {
+                "sku": _text(row, "sku", 64),
+                "name": _text(row, "name", 255),
+                "category": _text(row, "category", 255),
+                "stock_quantity": _count(row, "stock_quantity"),
+                "price_per_unit": _price(row),
+                "reorder_threshold": _count(row, "reorder_threshold"),
+                "reorder_quantity": _count(row, "reorder_quantity"),
+            }
+        except RowError as e:
+            errors.add(line_number, str(e))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class CategoryMap:
+    """Category name -> id, loaded once and extended in bulk as needed."""
+
+    def __init__(self):
+        self.ids = dict(Category.objects.values_list("category_name", "category_id"))
+
+    def resolve(self, rows):
+        missing = {row["category"] for row in rows} - self.ids.keys()
+        if missing:
+            created = Category.objects.bulk_create(
+                [Category(category_name=name) for name in sorted(missing)]
+            )
+            self.ids.update(
+                (category.category_name, category.category_id) for category in created
+            )
+        for row in rows:
+            row["category_id"] = self.ids[row.pop("category")]
+        return rows
+
+
+def _upsert_with_copy(rows):
+    table = Product._meta.db_table
+    fields = [Product._meta.get_field(name) for name in IMPORT_FIELDS]
+    columns = [field.column for field in fields]
+    column_list = ", ".join(columns)
+    definitions = ", ".join(
+        f"{field.column} {field.db_type(connection)}" for field in fields
+    )
+    updates = ", ".join(
+        f"{column} = EXCLUDED.{column}" for column in columns if column != "sku"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE product_import ({definitions}) ON COMMIT DROP"
+        )
+        with cursor.copy(f"COPY product_import ({column_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([row[name] for name in IMPORT_FIELDS])
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) "
+            f"SELECT {column_list} FROM product_import "
+            f"ON CONFLICT (sku) DO UPDATE SET {updates}"
+        )
+
+
+def _upsert_with_bulk_create(rows):
+    Product.objects.bulk_create(
+        [Product(**{name: row[name] for name in IMPORT_FIELDS}) for row in rows],
+        update_conflicts=True,
+        unique_fields=["sku"],
+        update_fields=[name for name in IMPORT_FIELDS if name != "sku"],
+    )
+
+
+def can_copy():
+    # COPY needs PostgreSQL through psycopg 3, whose cursors have copy()
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, "copy")
+
+
+def import_products(stream, file_format, batch_size=5000):
+    """
+    Upsert products from a CSV/JSONL text stream, keyed on SKU. Rows are
+    validated lazily and written one batch per transaction, so memory stays
+    bounded by ``batch_size`` whatever the file size.
+    """
+    errors = ErrorLog()
+    categories = CategoryMap()
+    upsert = _upsert_with_copy if can_copy() else _upsert_with_bulk_create
+
+    imported = 0
+    rows = validate_rows(read_rows(stream, file_format), errors)
+    for batch in batched(rows, batch_size):
+        # A SKU repeated in one batch would hit ON CONFLICT twice; last wins
+        batch = list({row["sku"]: row for row in batch}.values())
+        with transaction.atomic():
+            upsert(categories.resolve(batch))
+        imported += len(batch)
+
+    if imported:
+        bump_catalog_version()
+    return ImportResult(imported, errors.count, errors.entries)
+
+
+def _export_values():
+    # iterator() reads through a server-side cursor on PostgreSQL
+    products = (
+        Product.objects.select_related("category")
+        .order_by("product_id")
+        .iterator(chunk_size=2000)
+    )
+    for product in products:
+        yield [
+            product.sku,
+            product.name,
+            product.category.category_name,
+            product.stock_quantity,
+            product.price_per_unit,
+            product.reorder_threshold,
+            product.reorder_quantity,
+        ]
+
+
+def export_products(file_format):
+    """Yield the catalog as CSV/JSONL lines, in constant memory."""
+    if file_format == "csv":
+        return csv_lines(COLUMNS, _export_values())
+    return ndjson_lines(dict(zip(COLUMNS, values)) for values in _export_values())
@@ -0,0 +1,56 @@
+from itertools import groupby
+
+from django.utils import timezone
+
+from .models import Product
+
+
+def low_stock_products():
+    """Products at or below their reorder threshold, grouped by category."""
+    return (
+        Product.objects.needing_reorder()
+        .select_related("category")
+        .order_by("category_id", "product_id")
+    )
+
+
+def order_quantity(product):
+    # Order at least the configured lot, and enough to clear the threshold
+    return max(
+        product.reorder_quantity,
+        product.reorder_threshold - product.stock_quantity + 1,
+    )
+
+
+def purchase_order_drafts():
+    """
+    Build one purchase-order draft per category from a single pass over the
+    reorder index, so the cost follows the number of low-stock products
+    rather than the catalog size.
+    """
+    created_at = timezone.now()
+    drafts = []
+    for _, products in groupby(low_stock_products(), key=lambda p: p.category_id):
+        products = list(products)
+        lines = [
+            {
+                "product_id": product.product_id,
+                "sku": product.sku,
+                "name": product.name,
+                "stock_quantity": product.stock_quantity,
+                "reorder_threshold": product.reorder_threshold,
+                "order_quantity": order_quantity(product),
+                "unit_price": product.price_per_unit,
+            }
+            for product in products
+        ]
+        drafts.append(
+            {
+                "category_id": products[0].category_id,
+                "category": products[0].category.category_name,
+                "created_at": created_at,
+                "lines": lines,
+                "total_units": sum(line["order_quantity"] for line in lines),
+            }
+        )
+    return drafts
@@ -0,0 +1,149 @@
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CategorySalesDaily, OrderItem, ProductSalesDaily
+
+SALES_METRICS = ("units_sold", "revenue", "order_count")
+CANCELLATION_METRICS = ("cancelled_units", "cancelled_revenue", "cancelled_orders")
+METRICS = SALES_METRICS + CANCELLATION_METRICS
+UPSERT_BATCH_SIZE = 500
+
+# (rollup model, its key field, the OrderItem lookup for that key)
+ROLLUPS = (
+    (ProductSalesDaily, "product", "product"),
+    (CategorySalesDaily, "category", "product__category"),
+)
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _totals(items, lookup):
+    """Units, revenue and distinct orders per (day, key) for ``items``."""
+    line_total = ExpressionWrapper(
+        F("quantity") * F("price"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        items.annotate(day=TruncDate("order__order_date"))
+        .values("day", lookup)
+        .annotate(
+            units=Sum("quantity"),
+            amount=Sum(line_total),
+            orders=Count("order_id", distinct=True),
+        )
+        .order_by("day", lookup)
+    )
+    for row in rows:
+        yield (row["day"], row[lookup]), (row["units"], row["amount"], row["orders"])
+
+
+def _add_counts(model, key_field, totals, metrics):
+    """
+    Add ``totals`` to ``metrics`` of the matching rollup rows, creating rows
+    as needed, with INSERT ... ON CONFLICT DO UPDATE so concurrent writers
+    increment rather than overwrite each other.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    key_column = quote(model._meta.get_field(key_field).column)
+    columns = ", ".join([quote("day"), key_column] + [quote(m) for m in METRICS])
+    updates = ", ".join(
+        f"{quote(m)} = {table}.{quote(m)} + EXCLUDED.{quote(m)}" for m in metrics
+    )
+    row_placeholder = "(" + ", ".join(["%s"] * (len(METRICS) + 2)) + ")"
+
+    totals = sorted(totals)  # Lock rows in a consistent order
+    with connection.cursor() as cursor:
+        for start in range(0, len(totals), UPSERT_BATCH_SIZE):
+            batch = totals[start : start + UPSERT_BATCH_SIZE]
+            params = []
+            for key, values in batch:
+                counts = dict(zip(metrics, values))
+                params.extend(key)
+                params.extend(counts.get(metric, 0) for metric in METRICS)
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"VALUES {', '.join([row_placeholder] * len(batch))} "
+                f"ON CONFLICT ({quote('day')}, {key_column}) DO UPDATE SET {updates}",
+                params,
+            )
+
+
+def _record(order_ids, metrics):
+    items = OrderItem.objects.filter(order_id__in=order_ids)
+    for model, key_field, lookup in ROLLUPS:
+        _add_counts(model, key_field, list(_totals(items, lookup)), metrics)
+
+
+def record_sales(order_ids):
+    """Count the given orders as sold. Call in the transaction that pays them."""
+    _record(order_ids, SALES_METRICS)
+
+
+def record_cancellations(order_ids):
+    """Count the given orders as cancelled, in the transaction that cancels them."""
+    _record(order_ids, CANCELLATION_METRICS)
+
+
+def rebuild_rollups(first_day, last_day):
+    """
+    Recompute the rollups for ``first_day``..``last_day`` (inclusive) from
+    the orders, replacing what is stored for those days. Orders paid or
+    cancelled while a day is being rebuilt may need that day rebuilt again.
+    """
+    items = OrderItem.objects.filter(
+        order__order_date__gte=day_start(first_day),
+        order__order_date__lt=day_start(last_day + timedelta(days=1)),
+    )
+    sources = (
+        (SALES_METRICS, items.filter(order__payment_status="paid")),
+        (CANCELLATION_METRICS, items.filter(order__order_status="cancelled")),
+    )
+
+    rebuilt = 0
+    with transaction.atomic():
+        for model, key_field, lookup in ROLLUPS:
+            counts = {}
+            for metrics, source in sources:
+                for key, values in _totals(source, lookup):
+                    counts.setdefault(key, {}).update(zip(metrics, values))
+
+            key_attname = model._meta.get_field(key_field).attname
+            model.objects.filter(day__range=(first_day, last_day)).delete()
+            model.objects.bulk_create(
+                [
+                    model(day=day, **{key_attname: key}, **values)
+                    for (day, key), values in counts.items()
+                ],
+                batch_size=1000,
+            )
+            rebuilt += len(counts)
+    return rebuilt
+
+
+def sales_report(by, first_day, last_day):
+    """Daily rows and per-key totals for the admin dashboard."""
+    model, key_field, _ = next(rollup for rollup in ROLLUPS if rollup[1] == by)
+    name = "product__name" if by == "product" else "category__category_name"
+    key = f"{key_field}_id"
+
+    rows = model.objects.filter(day__range=(first_day, last_day))
+    days = rows.order_by("day", key).values("day", key, *METRICS)
+    totals = (
+        rows.values(key)
+        .annotate(name=F(name), **{metric: Sum(metric) for metric in METRICS})
+        .order_by("-revenue", key)
+    )
+    return {
+        "by": by,
+        "from": first_day,
+        "to": last_day,
+        "days": list(days),
+        "totals": list(totals),
+    }
@@ -0,0 +1,98 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections
+from django.utils.http import int_to_base36
+
+from .models import Sequence
+
+ORDER_NUMBER_DIGITS = 9  # 36**9 orders before the width grows
+
+
+class BlockAllocator:
+    """
+    Hand out increasing values of a named counter (hi/lo). Each process
+    reserves ``block_size`` values with one upsert and serves them from
+    memory, so values are unique across workers without a query each.
+
+    The reservation has to commit on its own: if it rolled back with the
+    caller's transaction, another worker could reserve the same block. So
+    it runs on a dedicated autocommit connection. SQLite allows a single
+    writer, which would deadlock against the caller's open transaction, so
+    there it uses the main connection and, inside a transaction, reserves
+    one value at a time so a rollback gives back nothing that's cached.
+    """
+
+    def __init__(self, name, block_size, using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.block_size = block_size
+        self.using = using
+        self._reset()
+        # A block reserved before a fork would be served by every child
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Never close an inherited connection: its socket is the parent's
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+        self._connection = None
+
+    def next_value(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve()
+            value = self._next
+            self._next += 1
+            return value
+
+    def _reserve(self):
+        main = connections[self.using]
+        if main.vendor != "sqlite":
+            try:
+                return self._reserve_on(self._own_connection(), self.block_size)
+            except (InterfaceError, OperationalError):
+                # The idle connection was dropped; retry once on a new one
+                self._connection.close()
+                return self._reserve_on(self._own_connection(), self.block_size)
+
+        size = 1 if main.in_atomic_block else self.block_size
+        return self._reserve_on(main, size)
+
+    def _own_connection(self):
+        if self._connection is None:
+            self._connection = connections.create_connection(self.using)
+            self._connection.inc_thread_sharing()  # Only used under self._lock
+        return self._connection
+
+    def _reserve_on(self, connection, size):
+        """Reserve ``size`` values; returns the reserved [start, end) range."""
+        quote = connection.ops.quote_name
+        table = quote(Sequence._meta.db_table)
+        next_value = quote("next_value")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({quote('name')}, {next_value}) "
+                f"VALUES (%s, %s) ON CONFLICT ({quote('name')}) "
+                f"DO UPDATE SET {next_value} = {table}.{next_value} + %s "
+                f"RETURNING {next_value}",
+                [self.name, 1 + size, size],
+            )
+            end = cursor.fetchone()[0]
+        return end - size, end
+
+
+order_numbers = BlockAllocator(
+    "order_number", block_size=settings.ORDER_NUMBERS["BLOCK_SIZE"]
+)
+
+
+def format_order_number(value):
+    # Fixed width, so the numbers sort in allocation order
+    digits = int_to_base36(value).upper().rjust(ORDER_NUMBER_DIGITS, "0")
+    return settings.ORDER_NUMBERS["PREFIX"] + digits
+
+
+def next_order_number():
+    """A unique order number, roughly in order of creation."""
+    return format_order_number(order_numbers.next_value())
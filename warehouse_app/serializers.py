@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from .instrumentation import TimedSerializerMixin
 from .models import CustomUser, Product, Category, Order, OrderItem, Transaction
 
 
 # Serializer for user registration and user details
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ["id", "email", "username", "name", "role", "contact_info", "password"]
@@ -37,14 +38,14 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 # Serializer for category
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = "__all__"
 
 
 # Serializer for products
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source="category", write_only=True
@@ -54,6 +55,7 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             "product_id",
+            "sku",
             "name",
             "category",
             "category_id",
@@ -62,16 +64,18 @@ class ProductSerializer(serializers.ModelSerializer):
             "reorder_threshold",
             "reorder_quantity",
             "image",
+            "image_thumbnail",
+            "image_medium",
         ]
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ["id", "product", "quantity", "price"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -88,7 +92,25 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ["order_number", "order_status", "payment_status"]
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+# Header-only order representation for the order history screen
+class OrderSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "order_number",
+            "order_status",
+            "order_date",
+            "total_price",
+            "payment_status",
+            "item_count",
+        ]
+        read_only_fields = fields
+
+
+class TransactionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = [
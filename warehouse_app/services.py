@@ -0,0 +1,201 @@
+import hashlib
+import logging
+from collections import defaultdict, namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+
+from .catalog_cache import bump_catalog_version
+from .models import Order, OrderItem, Product
+from .order_state import PENDING, cancel_orders
+from .sequences import next_order_number
+
+PRICE_TOLERANCE = Decimal("0.01")
+
+CartLine = namedtuple("CartLine", ["product_id", "quantity", "price"])
+StockResult = namedtuple("StockResult", ["applied", "shortfalls"])
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cart_line(item):
+    try:
+        line = CartLine(
+            product_id=int(item["product"]),
+            quantity=int(item["quantity"]),
+            price=Decimal(str(item["price"])),
+        )
+    except (KeyError, TypeError, ValueError, InvalidOperation):
+        raise ValidationError(f"Invalid order item: {item}")
+
+    if line.quantity <= 0:
+        raise ValidationError(f"Invalid quantity for product {line.product_id}")
+    if not line.price.is_finite() or line.price <= 0:
+        raise ValidationError(f"Invalid price for product {line.product_id}")
+    return line
+
+
+def cart_fingerprint(lines):
+    """
+    Order-independent SHA-256 of the cart lines and their total. Prices are
+    rounded to cents so "10", "10.0" and 10.00 hash the same.
+    """
+    canonical = sorted(
+        (line.product_id, line.quantity, line.price.quantize(PRICE_TOLERANCE))
+        for line in lines
+    )
+    total = sum((price * quantity for _, quantity, price in canonical), Decimal(0))
+    payload = ";".join(f"{pid}:{qty}:{price}" for pid, qty, price in canonical)
+    return hashlib.sha256(f"{payload}|{total}".encode()).hexdigest()
+
+
+def place_order(user, lines):
+    """
+    Return ``(order, created)``. A pending order with the same fingerprint
+    is reused; any other pending order of the user is cancelled and a new
+    one is created.
+    """
+    fingerprint = cart_fingerprint(lines)
+    pending = Order.objects.filter(user=user, **PENDING._asdict())
+
+    existing = pending.filter(cart_fingerprint=fingerprint).first()
+    if existing:
+        logger.debug("Reusing pending order %s for user %s", existing.id, user.id)
+        return existing, False
+
+    abandoned = cancel_orders(pending)
+    if abandoned:
+        logger.info("Cancelled abandoned orders %s of user %s", abandoned, user.id)
+    return create_order(user, lines, fingerprint), True
+
+
+def create_order(user, lines, fingerprint=""):
+    """
+    Create a pending order for ``lines`` (parsed cart lines) using a fixed
+    number of queries regardless of cart size. Prices and stock are
+    validated against the locked product rows and the order total is
+    computed from the catalog prices.
+    """
+    product_ids = sorted({line.product_id for line in lines})
+
+    with transaction.atomic():
+        # Lock in primary-key order so concurrent checkouts can't deadlock
+        products = {
+            product.product_id: product
+            for product in Product.objects.select_for_update()
+            .filter(product_id__in=product_ids)
+            .order_by("product_id")
+        }
+
+        missing = [pid for pid in product_ids if pid not in products]
+        if missing:
+            raise ValidationError(f"Products not found: {missing}")
+
+        requested = defaultdict(int)
+        total_price = Decimal("0.00")
+        for line in lines:
+            product = products[line.product_id]
+            if abs(product.price_per_unit - line.price) > PRICE_TOLERANCE:
+                raise ValidationError(
+                    f"Price mismatch for {product.name}. Expected: {product.price_per_unit}, Got: {line.price}"
+                )
+            requested[line.product_id] += line.quantity
+            total_price += product.price_per_unit * line.quantity
+
+        # Check stock availability
+        for product_id, quantity in requested.items():
+            product = products[product_id]
+            if product.stock_quantity < quantity:
+                raise ValidationError(f"Not enough stock for {product.name}")
+
+        order = Order.objects.create(
+            user=user,
+            order_number=next_order_number(),
+            total_price=total_price,
+            **PENDING._asdict(),
+            cart_fingerprint=fingerprint,
+        )
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    product_id=line.product_id,
+                    quantity=line.quantity,
+                    price=products[line.product_id].price_per_unit,
+                )
+                for line in lines
+            ]
+        )
+
+    logger.info(
+        "Created order %s",
+        order.order_number,
+        extra={"order_id": order.id, "user_id": user.id, "lines": len(lines)},
+    )
+    return order
+
+
+class _StockShortfall(Exception):
+    pass
+
+
+def order_quantities(order):
+    """Units per product for ``order``, summed in the database."""
+    return dict(
+        order.items.values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+
+
+def _delta_expression(quantities):
+    return Case(
+        *[
+            When(product_id=product_id, then=Value(quantity))
+            for product_id, quantity in quantities.items()
+        ],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def decrement_stock(quantities):
+    """
+    Take ``quantities`` ({product_id: units}) out of stock with a single
+    UPDATE whose WHERE clause only matches rows holding enough stock.
+
+    The change is all-or-nothing: if any product is short, nothing is
+    applied and ``shortfalls`` maps each failing product id to the units
+    currently available (0 for products that no longer exist).
+    """
+    if not quantities:
+        return StockResult(applied=True, shortfalls={})
+
+    guard = Q()
+    for product_id, quantity in quantities.items():
+        guard |= Q(product_id=product_id, stock_quantity__gte=quantity)
+
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(guard).update(
+                stock_quantity=F("stock_quantity") - _delta_expression(quantities)
+            )
+            if updated != len(quantities):
+                raise _StockShortfall
+            transaction.on_commit(bump_catalog_version)
+    except _StockShortfall:
+        available = dict(
+            Product.objects.filter(product_id__in=quantities).values_list(
+                "product_id", "stock_quantity"
+            )
+        )
+        shortfalls = {
+            product_id: available.get(product_id, 0)
+            for product_id, quantity in quantities.items()
+            if available.get(product_id, 0) < quantity
+        }
+        return StockResult(applied=False, shortfalls=shortfalls)
+
+    return StockResult(applied=True, shortfalls={})
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .catalog_cache import bump_catalog_version
+from .images import renditions_current, schedule_renditions
+from .models import Category, CustomUser, Product
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    # Bump after commit so readers can't cache the pre-commit rows
+    # under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Product)
+def render_product_images(sender, instance, **kwargs):
+    if not renditions_current(instance):
+        product_id = instance.pk
+        transaction.on_commit(lambda: schedule_renditions(product_id))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate_user(str(instance.pk))
@@ -0,0 +1,36 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class Echo:
+    """File-like object whose write() hands the value straight back."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+def streaming_file_response(lines, file_format, filename):
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[file_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
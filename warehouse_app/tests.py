@@ -1,3 +1,1475 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import urls
+from .authentication import user_cache
+from .benchmarks import SCENARIOS
+from .idempotency import expired_before
+from .logs import BackgroundHandler, JsonFormatter, RequestIdFilter
+from .order_state import CANCEL, PAY, apply_transition, cancel_orders
+from .payments import FakeGateway, get_gateway
+from .product_io import COLUMNS, import_products
+from .rollups import METRICS, rebuild_rollups
+from .sequences import BlockAllocator, format_order_number
+from .services import decrement_stock, parse_cart_line, place_order
+from .tokens import BlacklistFilter, FilteredRefreshToken
+from .webhooks import EVENT_HANDLERS, process_webhook_batch, record_event
+from .models import (
+    Category,
+    CategorySalesDaily,
+    CustomUser,
+    IdempotencyKey,
+    Order,
+    OrderItem,
+    Product,
+    ProductSalesDaily,
+    Transaction,
+    WebhookEvent,
+)
+
+# What a full table scan looks like in each backend's EXPLAIN output
+SEQUENTIAL_SCAN_PATTERNS = {
+    "postgresql": r"Seq Scan on (\w+)",
+    "sqlite": r"\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)",
+}
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Seed enough rows for the planner to prefer indexes, then check that
+    the hot order/transaction queries never fall back to sequential scans.
+    """
+
+    USERS = 200
+    ORDERS_PER_USER = 25
+    PRODUCTS = 500
+    LOW_STOCK_PRODUCTS = 10
+    STATUSES = [
+        ("pending", "pending"),
+        ("processed", "paid"),
+        ("cancelled", "cancelled"),
+        ("pending", "failed"),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        users = CustomUser.objects.bulk_create(
+            CustomUser(
+                email=f"trader{i}@example.com",
+                username=f"trader{i}",
+                password="!",
+            )
+            for i in range(cls.USERS)
+        )
+        category = Category.objects.create(category_name="General")
+        product, *_ = Product.objects.bulk_create(
+            Product(
+                name=f"Widget {i}",
+                category=category,
+                stock_quantity=0 if i < cls.LOW_STOCK_PRODUCTS else 100,
+                price_per_unit=10,
+                reorder_threshold=5,
+                reorder_quantity=50,
+            )
+            for i in range(cls.PRODUCTS)
+        )
+
+        orders = Order.objects.bulk_create(
+            Order(
+                user=user,
+                order_number=f"PLAN{u:04d}{n:03d}",
+                order_status=cls.STATUSES[n % len(cls.STATUSES)][0],
+                payment_status=cls.STATUSES[n % len(cls.STATUSES)][1],
+                total_price=10,
+            )
+            for u, user in enumerate(users)
+            for n in range(cls.ORDERS_PER_USER)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=1, price=10)
+            for order in orders
+        )
+        Transaction.objects.bulk_create(
+            Transaction(order=order, user_id=order.user_id, amount=10)
+            for order in orders
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.user = users[cls.USERS // 2]
+        cls.since = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    def assertNoSequentialScan(self, queryset):
+        pattern = SEQUENTIAL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f"No plan checks for {connection.vendor}")
+
+        plan = queryset.explain()
+        scanned = set(re.findall(pattern, plan))
+        self.assertFalse(scanned, f"Sequential scan on {scanned}:\n{plan}")
+
+    def test_pending_order_lookup(self):
+        self.assertNoSequentialScan(
+            Order.objects.filter(
+                user=self.user, payment_status="pending", order_status="pending"
+            )
+        )
+
+    def test_order_history(self):
+        self.assertNoSequentialScan(
+            Order.objects.filter(user=self.user).order_by("-order_date", "-id")
+        )
+
+    def test_order_history_summary(self):
+        self.assertNoSequentialScan(
+            Order.objects.filter(user=self.user)
+            .order_by("-order_date", "-id")
+            .with_item_count()
+        )
+
+    def test_order_items_prefetch(self):
+        order_ids = Order.objects.filter(user=self.user).values("id")
+        self.assertNoSequentialScan(OrderItem.objects.filter(order__in=order_ids))
+
+    def test_user_transactions(self):
+        self.assertNoSequentialScan(Transaction.objects.filter(user=self.user))
+
+    def test_filtered_transaction_export(self):
+        self.assertNoSequentialScan(
+            Transaction.objects.filter(
+                user=self.user,
+                payment_status="pending",
+                transaction_date__gte=self.since,
+            ).order_by("transaction_date", "id")
+        )
+
+    def test_filtered_order_export(self):
+        self.assertNoSequentialScan(
+            Order.objects.filter(
+                user=self.user, order_status="processed", order_date__gte=self.since
+            ).order_by("order_date", "id")
+        )
+
+    def test_expired_pending_orders(self):
+        self.assertNoSequentialScan(
+            Order.objects.filter(
+                order_status="pending",
+                payment_status="pending",
+                order_date__lt=self.since,
+            ).order_by("order_date")[:500]
+        )
+
+    def test_rollup_rebuild_chunk(self):
+        self.assertNoSequentialScan(
+            OrderItem.objects.filter(
+                order__order_date__gte=self.since,
+                order__order_date__lt=datetime(2025, 2, 1, tzinfo=dt_timezone.utc),
+            )
+        )
+
+    def test_reorder_candidates(self):
+        self.assertNoSequentialScan(
+            Product.objects.needing_reorder().order_by("category_id", "product_id")
+        )
+
+
+class BenchmarkCoverageTests(SimpleTestCase):
+    def test_every_route_has_a_scenario(self):
+        routes = {pattern.name for pattern in urls.urlpatterns}
+        covered = {scenario.route for scenario in SCENARIOS}
+        self.assertEqual(routes - covered, set())
+
+
+class BlockAllocatorTests(TransactionTestCase):
+    def test_workers_get_disjoint_increasing_values(self):
+        first = BlockAllocator("test", block_size=3)
+        second = BlockAllocator("test", block_size=3)
+
+        values = [first.next_value(), second.next_value(), first.next_value()]
+        values += [first.next_value() for _ in range(3)]
+
+        self.assertEqual(values, [1, 4, 2, 3, 7, 8])
+
+    def test_order_numbers_sort_in_allocation_order(self):
+        numbers = [format_order_number(value) for value in (9, 35, 36, 1295)]
+        self.assertEqual(numbers, sorted(numbers))
+        self.assertEqual(numbers[2], "MG000000010")
+
+
+class OrderStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        cls.pending, cls.failed, cls.paid = Order.objects.bulk_create(
+            Order(
+                user=cls.user,
+                order_number=f"T{n}",
+                order_status=order_status,
+                payment_status=payment_status,
+            )
+            for n, (order_status, payment_status) in enumerate(
+                [("pending", "pending"), ("pending", "failed"), ("processed", "paid")]
+            )
+        )
+
+    def test_moves_only_orders_in_a_source_state(self):
+        with self.assertNumQueries(1):
+            moved = apply_transition(PAY, Order.objects.all())
+
+        self.assertEqual(sorted(moved), [self.pending.id, self.failed.id])
+        self.assertEqual(apply_transition(CANCEL, Order.objects.all()), [])
+
+    def test_cancel_fails_open_payments(self):
+        Transaction.objects.create(
+            order=self.pending, user=self.user, amount=10, stripe_payment_intent_id="a"
+        )
+
+        cancelled = cancel_orders(Order.objects.filter(id=self.pending.id))
+
+        self.assertEqual(cancelled, [self.pending.id])
+        self.assertEqual(
+            Transaction.objects.get(order=self.pending).payment_status, "failed"
+        )
+        self.assertEqual(apply_transition(PAY, Order.objects.all()), [self.failed.id])
+
+    def test_sweep_expires_old_pending_orders(self):
+        Order.objects.filter(id=self.pending.id).update(
+            order_date=datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        out = io.StringIO()
+        call_command("expire_pending_orders", batch_size=1, stdout=out)
+
+        self.assertIn("Expired 1 pending orders in 2 batches", out.getvalue())
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.order_status, "cancelled")
+
+    def test_sweep_needs_a_positive_batch_size(self):
+        with self.assertRaises(CommandError):
+            call_command("expire_pending_orders", batch_size=0)
+
+    def test_loop_survives_database_errors(self):
+        class Stop(Exception):
+            pass
+
+        command = "warehouse_app.management.commands.expire_pending_orders"
+        sweeps = [OperationalError("server closed the connection"), (3, 1), Stop]
+        out = io.StringIO()
+        with (
+            mock.patch(f"{command}.Command.sweep", side_effect=sweeps),
+            mock.patch(f"{command}.close_old_connections") as close,
+            mock.patch(f"{command}.time.sleep"),
+            self.assertLogs(command, "ERROR") as logs,
+            self.assertRaises(Stop),
+        ):
+            call_command("expire_pending_orders", loop=True, stdout=out)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("Expired 3 pending orders in 1 batches", out.getvalue())
+        self.assertEqual(close.call_count, 2)
+
+
+class CartLineTests(SimpleTestCase):
+    def test_rejects_non_positive_and_non_finite_values(self):
+        for price, quantity in [
+            ("NaN", 1),
+            ("Infinity", 1),
+            ("-1.00", 1),
+            ("0", 1),
+            ("10.00", 0),
+        ]:
+            with self.subTest(price=price, quantity=quantity):
+                with self.assertRaises(ValidationError):
+                    parse_cart_line(
+                        {"product": 1, "quantity": quantity, "price": price}
+                    )
+
+    def test_parses_valid_line(self):
+        line = parse_cart_line({"product": "3", "quantity": "2", "price": 9.5})
+        self.assertEqual(line, (3, 2, Decimal("9.5")))
+
+
+class PaginationTests(TestCase):
+    ORDERS = 7
+    # The first orders share one timestamp, so pages must split ties by id
+    TIED_ORDERS = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        category = Category.objects.create(category_name="General")
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Widget {n}",
+                category=category,
+                stock_quantity=100,
+                price_per_unit=10,
+                reorder_threshold=1,
+                reorder_quantity=10,
+            )
+            for n in range(5)
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=cls.user, order_number=f"T{n}") for n in range(cls.ORDERS)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=1, price=10)
+            for n, order in enumerate(orders)
+            for product in products[: n % 3 + 1]
+        )
+        placed = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        for n, order in enumerate(orders):
+            Order.objects.filter(pk=order.pk).update(
+                order_date=placed + timedelta(days=max(n - cls.TIED_ORDERS + 1, 0))
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, page_size, key="id"):
+        """Follow ``next`` links from the first page, returning the row ids."""
+        ids = []
+        response = self.client.get(url, {"page_size": page_size})
+        while True:
+            self.assertLessEqual(len(response.data["results"]), page_size)
+            ids += [row[key] for row in response.data["results"]]
+            if response.data["next"] is None:
+                return ids
+            response = self.client.get(response.data["next"])
+
+    def test_unpaginated_responses_are_plain_lists(self):
+        for url, count in [
+            (reverse("user-orders-list"), self.ORDERS),
+            (reverse("add-product"), Product.objects.count()),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIsInstance(response.data, list)
+                self.assertEqual(len(response.data), count)
+
+    def test_pages_cover_every_order_once(self):
+        expected = list(
+            Order.objects.order_by("-order_date", "-id").values_list("id", flat=True)
+        )
+        for page_size in (1, 2, 3, self.ORDERS):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(
+                    self.walk(reverse("user-orders-list"), page_size), expected
+                )
+
+    def test_pages_cover_every_product_once(self):
+        expected = list(
+            Product.objects.order_by("product_id").values_list("product_id", flat=True)
+        )
+        self.assertEqual(
+            self.walk(reverse("add-product"), 2, key="product_id"), expected
+        )
+
+    def test_summary_rows_count_items_without_listing_them(self):
+        response = self.client.get(reverse("user-orders-list"), {"view": "summary"})
+
+        item_counts = {order.id: order.items.count() for order in Order.objects.all()}
+        self.assertEqual(
+            {row["id"]: row["item_count"] for row in response.data}, item_counts
+        )
+        self.assertTrue(all("items" not in row for row in response.data))
+
+
+class ReplenishmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(
+            email="buyer@example.com", username="buyer", password="!", is_staff=True
+        )
+        tools, parts = Category.objects.bulk_create(
+            Category(category_name=name) for name in ["Tools", "Parts"]
+        )
+        # (category, stock, threshold, lot)
+        cls.products = Product.objects.bulk_create(
+            Product(
+                name=f"Widget {n}",
+                category=category,
+                stock_quantity=stock,
+                price_per_unit=10,
+                reorder_threshold=threshold,
+                reorder_quantity=lot,
+            )
+            for n, (category, stock, threshold, lot) in enumerate(
+                [
+                    (tools, 5, 5, 20),  # at the threshold
+                    (tools, 6, 5, 20),
+                    (parts, 0, 30, 10),  # short by more than a lot
+                    (tools, 1, 5, 20),
+                    (parts, 100, 5, 10),
+                ]
+            )
+        )
+        cls.low = [cls.products[n].pk for n in (0, 2, 3)]
+
+    def test_low_stock_lists_products_at_or_below_threshold(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse("low-stock-products"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual([row["product_id"] for row in response.data], self.low)
+
+    def test_low_stock_is_for_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(
+            CustomUser.objects.create(
+                email="trader@example.com", username="trader", password="!"
+            )
+        )
+        response = client.get(reverse("low-stock-products"))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_purchase_orders_draft_one_order_per_category(self):
+        out = io.StringIO()
+        call_command("generate_purchase_orders", stdout=out, stderr=io.StringIO())
+
+        drafts = {
+            draft["category"]: {
+                line["product_id"]: line["order_quantity"] for line in draft["lines"]
+            }
+            for draft in json.loads(out.getvalue())
+        }
+        tool, _, part, other_tool, _ = (product.pk for product in self.products)
+        self.assertEqual(
+            drafts,
+            {"Tools": {tool: 20, other_tool: 20}, "Parts": {part: 31}},
+        )
+
+
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        cls.category = Category.objects.create(category_name="General")
+        cls.product = Product.objects.create(
+            name="Widget",
+            category=cls.category,
+            stock_quantity=100,
+            price_per_unit=10,
+            reorder_threshold=1,
+            reorder_quantity=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def etag(self):
+        return self.client.get(reverse("add-product"))["ETag"]
+
+    def test_second_get_is_served_from_cache(self):
+        first = self.client.get(reverse("add-product"))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("add-product"))
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.etag()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("add-product"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_matching_etag_for_a_missing_object_is_not_found(self):
+        etag = self.etag()
+        found = self.client.get(
+            reverse("product-detail", args=[self.product.pk]),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        missing = self.client.get(
+            reverse("product-detail", args=[self.product.pk + 1]),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(found.status_code, 304)
+        self.assertEqual(missing.status_code, 404)
+
+    def test_writes_change_the_etag_once_committed(self):
+        writes = {
+            "product": self.product.save,
+            "category": self.category.save,
+            "stock": lambda: decrement_stock({self.product.pk: 1}),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                before = self.etag()
+                with self.captureOnCommitCallbacks() as callbacks:
+                    write()
+                    self.assertEqual(self.etag(), before)
+                for callback in callbacks:
+                    callback()
+                self.assertNotEqual(self.etag(), before)
+
+
+class AsyncViewTests(TestCase):
+    # (sync route, async route, query parameters)
+    READS = [
+        ("add-product", "async-product-list", {}),
+        ("add-product", "async-product-list", {"page_size": 2}),
+        ("category-list", "async-category-list", {}),
+        ("user-orders-list", "async-orders-list", {}),
+        ("user-orders-list", "async-orders-list", {"page_size": 2}),
+        ("user-orders-list", "async-orders-list", {"view": "summary"}),
+        ("user-orders-list", "async-orders-list", {"view": "summary", "page_size": 2}),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = CustomUser.objects.bulk_create(
+            CustomUser(email=f"{name}@example.com", username=name, password="!")
+            for name in ["trader", "other"]
+        )
+        category = Category.objects.create(category_name="General")
+        cls.products = Product.objects.bulk_create(
+            Product(
+                name=f"Widget {n}",
+                category=category,
+                stock_quantity=100,
+                price_per_unit=10,
+                reorder_threshold=1,
+                reorder_quantity=10,
+            )
+            for n in range(5)
+        )
+        cls.orders = Order.objects.bulk_create(
+            Order(user=user, order_number=f"T{n}")
+            for n, user in enumerate([cls.user] * 5 + [cls.other])
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=2, price=10)
+            for n, order in enumerate(cls.orders)
+            for product in cls.products[: n % 3 + 1]
+        )
+
+    def setUp(self):
+        cache.clear()
+        token = AccessToken.for_user(self.user)
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    async def pages(self, url, params, fetch):
+        """The JSON of ``url`` and, when paginated, of each following page."""
+        response = await fetch(url, params)
+        self.assertEqual(response.status_code, 200)
+        payloads = [response.json()]
+        while isinstance(payloads[-1], dict) and payloads[-1]["next"]:
+            response = await fetch(payloads[-1]["next"], {})
+            payloads.append(response.json())
+        return payloads
+
+    async def test_payloads_match_the_sync_views(self):
+        async def sync_get(url, params):
+            return await sync_to_async(self.client.get)(url, params)
+
+        async def async_get(url, params):
+            return await self.async_client.get(url, params, headers=self.headers)
+
+        for sync_route, async_route, params in self.READS:
+            with self.subTest(route=async_route, params=params):
+                expected = await self.pages(reverse(sync_route), params, sync_get)
+                payloads = await self.pages(reverse(async_route), params, async_get)
+
+                self.assertEqual(len(payloads), len(expected))
+                for payload, page in zip(payloads, expected):
+                    if isinstance(page, dict):
+                        # Only the links' paths differ
+                        payload, page = payload["results"], page["results"]
+                    self.assertEqual(payload, page)
+
+    async def test_order_detail_matches_the_sync_view(self):
+        order = self.orders[2]
+        for sync_route, async_route in [
+            ("order-detail", "async-order-detail"),
+            ("order-payment-status", "async-order-payment-status"),
+        ]:
+            with self.subTest(route=async_route):
+                expected = await sync_to_async(self.client.get)(
+                    reverse(sync_route, args=[order.pk])
+                )
+                response = await self.async_client.get(
+                    reverse(async_route, args=[order.pk]), headers=self.headers
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+
+    async def test_requests_without_a_token_are_unauthorized(self):
+        for route, args in [
+            ("async-orders-list", []),
+            ("async-order-detail", [self.orders[0].pk]),
+            ("async-category-list", []),
+            ("async-product-detail", [self.products[0].pk]),
+        ]:
+            with self.subTest(route=route):
+                response = await self.async_client.get(reverse(route, args=args))
+                self.assertEqual(response.status_code, 401)
+                self.assertIn("WWW-Authenticate", response)
+
+        # Like its sync counterpart, the product list is public
+        response = await self.async_client.get(reverse("async-product-list"))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_missing_and_foreign_orders_are_not_found(self):
+        foreign = self.orders[-1].pk
+        missing = foreign + 1
+        for pk in (foreign, missing):
+            with self.subTest(pk=pk):
+                response = await self.async_client.get(
+                    reverse("async-order-detail", args=[pk]), headers=self.headers
+                )
+                self.assertEqual(response.status_code, 404)
+
+    async def test_matching_etag_is_not_modified(self):
+        first = await self.async_client.get(reverse("async-product-list"))
+        etag = first["ETag"]
+        not_modified = await self.async_client.get(
+            reverse("async-product-list"), headers={"If-None-Match": etag}
+        )
+        missing = await self.async_client.get(
+            reverse("async-product-detail", args=[self.products[-1].pk + 1]),
+            headers={**self.headers, "If-None-Match": etag},
+        )
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(missing.status_code, 404)
+
+
+class StockDecrementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name="General")
+        cls.plenty, cls.scarce = Product.objects.bulk_create(
+            Product(
+                name=name,
+                category=category,
+                stock_quantity=stock,
+                price_per_unit=10,
+                reorder_threshold=1,
+                reorder_quantity=10,
+            )
+            for name, stock in [("Plenty", 100), ("Scarce", 2)]
+        )
+
+    def stock(self):
+        return dict(Product.objects.values_list("product_id", "stock_quantity"))
+
+    def test_applies_all_lines_when_stock_allows(self):
+        result = decrement_stock({self.plenty.pk: 10, self.scarce.pk: 2})
+
+        self.assertEqual(result, (True, {}))
+        self.assertEqual(self.stock(), {self.plenty.pk: 90, self.scarce.pk: 0})
+
+    def test_applies_nothing_when_any_line_is_short(self):
+        result = decrement_stock({self.plenty.pk: 10, self.scarce.pk: 3, 0: 1})
+
+        self.assertFalse(result.applied)
+        self.assertEqual(result.shortfalls, {self.scarce.pk: 2, 0: 0})
+        self.assertEqual(self.stock(), {self.plenty.pk: 100, self.scarce.pk: 2})
+
+
+class PlaceOrderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        category = Category.objects.create(category_name="General")
+        cls.product = Product.objects.create(
+            name="Widget",
+            category=category,
+            stock_quantity=100,
+            price_per_unit=10,
+            reorder_threshold=1,
+            reorder_quantity=10,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def cart(self, quantity, price="10.00"):
+        return [{"product": self.product.pk, "quantity": quantity, "price": price}]
+
+    def lines(self, quantity, price="10.00"):
+        return [parse_cart_line(item) for item in self.cart(quantity, price)]
+
+    def test_reuses_pending_order_for_the_same_cart(self):
+        order, created = place_order(self.user, self.lines(2))
+        # Same lines, with the price written differently
+        again, created_again = place_order(self.user, self.lines(2, price="10"))
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, order.pk)
+
+    def test_new_cart_cancels_the_abandoned_order(self):
+        order, _ = place_order(self.user, self.lines(2))
+        replacement, created = place_order(self.user, self.lines(3))
+
+        order.refresh_from_db()
+        self.assertTrue(created)
+        self.assertNotEqual(replacement.pk, order.pk)
+        self.assertEqual(order.order_status, "cancelled")
+
+    def test_idempotent_retry_replays_the_response(self):
+        url = reverse("create-order")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "checkout-1"}
+
+        first = self.client.post(url, {"items": self.cart(2)}, format="json", **headers)
+        # Without the key this would reuse the pending order with a 200
+        retry = self.client.post(url, {"items": self.cart(2)}, format="json", **headers)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reused_for_another_body_is_rejected(self):
+        url = reverse("create-order")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "checkout-1"}
+
+        self.client.post(url, {"items": self.cart(2)}, format="json", **headers)
+        response = self.client.post(
+            url, {"items": self.cart(5)}, format="json", **headers
+        )
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_expired_key_starts_a_new_request(self):
+        url = reverse("create-order")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "checkout-1"}
+
+        self.client.post(url, {"items": self.cart(2)}, format="json", **headers)
+        IdempotencyKey.objects.update(
+            created_at=expired_before() - timedelta(seconds=1)
+        )
+        response = self.client.post(
+            url, {"items": self.cart(5)}, format="json", **headers
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            IdempotencyKey.objects.get().response_body["id"], response.data["id"]
+        )
+
+    def test_prune_deletes_only_expired_keys(self):
+        IdempotencyKey.objects.bulk_create(
+            IdempotencyKey(
+                user=self.user,
+                key=f"checkout-{n}",
+                request_fingerprint="",
+                response_status=201,
+                response_body={},
+            )
+            for n in range(5)
+        )
+        IdempotencyKey.objects.filter(key__in=["checkout-0", "checkout-3"]).update(
+            created_at=expired_before() - timedelta(seconds=1)
+        )
+        out = io.StringIO()
+        call_command("prune_idempotency_keys", chunk_size=1, pause=0, stdout=out)
+
+        self.assertIn("Pruned 2 expired idempotency keys", out.getvalue())
+        self.assertEqual(IdempotencyKey.objects.count(), 3)
+
+
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        self.handled = []
+        self.failing = set()
+        patcher = mock.patch.dict(EVENT_HANDLERS, {"test.event": self.handle})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def handle(self, data):
+        self.handled.append(data["name"])
+        if data["name"] in self.failing:
+            raise RuntimeError(f"{data['name']} failed")
+
+    def record(self, name, created, intent="pi_1"):
+        record_event(
+            {
+                "id": f"evt_{name}",
+                "type": "test.event",
+                "created": created,
+                "data": {
+                    "object": {"object": "payment_intent", "id": intent, "name": name}
+                },
+            }
+        )
+
+    def make_due(self):
+        WebhookEvent.objects.update(
+            next_attempt_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+        )
+
+    def test_redelivered_event_is_recorded_once(self):
+        self.record("a", 1000)
+        self.record("a", 1000)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_events_of_an_intent_run_in_creation_order(self):
+        self.record("second", 2000)
+        self.record("first", 1000)
+        self.record("other", 1500, intent="pi_2")
+        self.failing.add("first")
+
+        # "second" waits behind the failed "first" without taking a slot
+        self.assertEqual(process_webhook_batch(batch_size=2), 2)
+        self.make_due()
+        self.failing.clear()
+        self.assertEqual(process_webhook_batch(), 1)
+        self.assertEqual(process_webhook_batch(), 1)
+
+        self.assertEqual(self.handled, ["first", "other", "first", "second"])
+        self.assertFalse(WebhookEvent.objects.exclude(status="processed").exists())
+
+    def test_failures_back_off_then_give_up(self):
+        self.record("a", 1000)
+        self.failing.add("a")
+
+        process_webhook_batch(max_attempts=2)
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+        self.assertIn("a failed", event.last_error)
+        # Not due again until the backoff has passed
+        self.assertEqual(process_webhook_batch(max_attempts=2), 0)
+
+        self.make_due()
+        process_webhook_batch(max_attempts=2)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("failed", 2))
+
+
+class SalesRollupTests(TestCase):
+    ORDERS = 5
+    PAID = (0, 1, 2)
+    CANCELLED = (3, 4)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        cls.admin = CustomUser.objects.create(
+            email="boss@example.com", username="boss", password="!", is_staff=True
+        )
+        tools, parts = Category.objects.bulk_create(
+            Category(category_name=name) for name in ["Tools", "Parts"]
+        )
+        cls.hammer, cls.saw, cls.bolt = Product.objects.bulk_create(
+            Product(
+                name=name,
+                category=category,
+                stock_quantity=100,
+                price_per_unit=price,
+                reorder_threshold=1,
+                reorder_quantity=10,
+            )
+            for name, category, price in [
+                ("Hammer", tools, 10),
+                ("Saw", tools, 5),
+                ("Bolt", parts, 2),
+            ]
+        )
+        cls.orders = Order.objects.bulk_create(
+            Order(user=cls.user, order_number=f"T{n}") for n in range(cls.ORDERS)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=quantity, price=price)
+            for n, order in enumerate(cls.orders)
+            for product, quantity, price in [
+                (cls.hammer, n + 1, 10),
+                (cls.bolt, 2, 2),
+                *([(cls.saw, 1, 5)] if n % 2 == 0 else []),
+            ]
+        )
+        Transaction.objects.bulk_create(
+            Transaction(
+                order=order,
+                user=cls.user,
+                amount=10,
+                stripe_payment_intent_id=f"pi_{n}",
+            )
+            for n, order in enumerate(cls.orders)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def pay(self, *numbers):
+        for n in numbers:
+            record_event(
+                {
+                    "id": f"evt_{n}",
+                    "type": "payment_intent.succeeded",
+                    "created": 1000 + n,
+                    "data": {"object": {"object": "payment_intent", "id": f"pi_{n}"}},
+                }
+            )
+        process_webhook_batch()
+
+    def cancel(self, *numbers):
+        cancel_orders(Order.objects.filter(id__in=[self.orders[n].id for n in numbers]))
+
+    def rollups(self):
+        return [
+            list(model.objects.order_by("day", key).values("day", key, *METRICS))
+            for model, key in [
+                (ProductSalesDaily, "product_id"),
+                (CategorySalesDaily, "category_id"),
+            ]
+        ]
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        self.pay(*self.PAID)
+        # Neither a paid order nor an already cancelled one changes again
+        self.cancel(*self.CANCELLED, self.PAID[0])
+        self.cancel(self.CANCELLED[0])
+        self.pay(self.CANCELLED[0])
+
+        incremental = self.rollups()
+        today = timezone.localdate()
+        rebuild_rollups(today, today)
+
+        self.assertEqual(incremental, self.rollups())
+        self.assertEqual(
+            ProductSalesDaily.objects.get(product=self.hammer).cancelled_units, 4 + 5
+        )
+
+    def test_report_totals(self):
+        self.pay(*self.PAID)
+        self.cancel(*self.CANCELLED)
+        today = timezone.localdate().isoformat()
+
+        expected = {
+            # name: (units_sold, revenue, order_count, cancelled_orders)
+            "product": {
+                "Hammer": (6, 60, 3, 2),
+                "Bolt": (6, 12, 3, 2),
+                "Saw": (2, 10, 2, 1),
+            },
+            "category": {"Tools": (8, 70, 3, 2), "Parts": (6, 12, 3, 2)},
+        }
+        for by, rows in expected.items():
+            with self.subTest(by=by):
+                response = self.client.get(
+                    reverse("sales-report"), {"by": by, "from": today, "to": today}
+                )
+                self.assertEqual(response.status_code, 200)
+                totals = response.data["totals"]
+                self.assertEqual(
+                    {
+                        row["name"]: (
+                            row["units_sold"],
+                            row["revenue"],
+                            row["order_count"],
+                            row["cancelled_orders"],
+                        )
+                        for row in totals
+                    },
+                    rows,
+                )
+                # Highest revenue first
+                self.assertEqual(totals[0]["name"], next(iter(rows)))
+                self.assertEqual(len(response.data["days"]), len(rows))
+
+    def test_report_rejects_bad_parameters(self):
+        for params in [
+            {"by": "supplier"},
+            {"from": "2025-02-30"},
+            {"from": "yesterday"},
+            {"from": "2025-03-02", "to": "2025-03-01"},
+            {"from": "2024-01-01", "to": "2025-01-01"},
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse("sales-report"), params)
+                self.assertEqual(response.status_code, 400)
+
+        # A full year is the longest span allowed
+        response = self.client.get(
+            reverse("sales-report"), {"from": "2025-01-01", "to": "2026-01-01"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_report_is_for_staff_only(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("sales-report"))
+        self.assertEqual(response.status_code, 403)
+
+
+FAKE_GATEWAY = {
+    "BACKEND": "warehouse_app.payments.FakeGateway",
+    # The test client's host, the only one allowed while testing
+    "OPTIONS": {"webhook_secret": "whsec_test", "webhook_host": "testserver"},
+}
+
+
+@override_settings(PAYMENT_GATEWAY=FAKE_GATEWAY)
+class PaymentGatewayTests(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        self.order = Order.objects.create(
+            user=self.user, order_number="T1", total_price=Decimal("12.50")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_fake_confirm_delivers_a_signed_webhook(self):
+        response = self.client.post(
+            reverse("create-payment-intent"), {"order_id": self.order.id}
+        )
+        transaction = Transaction.objects.get(id=response.data["transaction_id"])
+
+        response = self.client.post(
+            reverse("fake-payment-confirm", args=[transaction.id])
+        )
+        get_gateway().flush(timeout=10)
+
+        self.assertEqual(response.status_code, 202)
+        event = WebhookEvent.objects.get(event_id=response.data["event_id"])
+        self.assertEqual(event.event_type, "payment_intent.succeeded")
+        self.assertEqual(event.payment_intent_id, transaction.stripe_payment_intent_id)
+        self.assertEqual(event.payload["data"]["object"]["amount"], 1250)
+
+    def test_webhook_with_a_bad_signature_is_rejected(self):
+        payload = json.dumps(
+            {
+                "id": "evt_forged",
+                "object": "event",
+                "type": "payment_intent.succeeded",
+                "created": 1000,
+                "data": {"object": {"id": "pi_1", "object": "payment_intent"}},
+            }
+        )
+        forger = FakeGateway("whsec_forged")
+        self.addCleanup(forger._executor.shutdown)
+
+        response = self.client.post(
+            reverse("stripe-webhook"),
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=forger.sign(payload, int(time.time())),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_gateway_follows_the_setting(self):
+        gateway = get_gateway()
+        self.assertIs(get_gateway(), gateway)
+
+        options = {**FAKE_GATEWAY["OPTIONS"], "webhook_secret": "whsec_other"}
+        with override_settings(PAYMENT_GATEWAY={**FAKE_GATEWAY, "OPTIONS": options}):
+            self.assertEqual(get_gateway().webhook_secret, "whsec_other")
+
+        self.assertEqual(get_gateway().webhook_secret, "whsec_test")
+
+    @override_settings(
+        PAYMENT_GATEWAY={
+            "BACKEND": "warehouse_app.payments.StripeGateway",
+            "OPTIONS": {
+                "api_key": "sk_test_offline",
+                "webhook_secret": "whsec_test",
+                "max_network_retries": 0,
+            },
+        }
+    )
+    def test_stripe_errors_are_a_bad_gateway(self):
+        with mock.patch(
+            "requests.Session.request",
+            side_effect=requests.ConnectionError("connection refused"),
+        ):
+            response = self.client.post(
+                reverse("create-payment-intent"), {"order_id": self.order.id}
+            )
+
+        self.assertEqual(response.status_code, 502)
+        self.assertIn("error", response.data)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class VerifyCartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        category = Category.objects.create(category_name="General")
+        cls.product = Product.objects.create(
+            name="Widget",
+            category=category,
+            stock_quantity=5,
+            price_per_unit="12.50",
+            reorder_threshold=1,
+            reorder_quantity=10,
+        )
+
+    def verify(self, *items):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.post(reverse("verify-cart"), {"items": items}, format="json")
+
+    def test_matching_cart_is_valid(self):
+        response = self.verify(
+            {"product_id": self.product.pk, "price_per_unit": "12.5", "quantity": 2}
+        )
+        self.assertTrue(response.data["valid"])
+        self.assertEqual(response.data["items"][0]["status"], "ok")
+
+    def test_reports_each_line_that_changed(self):
+        response = self.verify(
+            {"product_id": self.product.pk, "price_per_unit": "10.00"},
+            {"product_id": self.product.pk, "price_per_unit": "12.50", "quantity": 6},
+            {"product_id": 0, "price_per_unit": "1.00"},
+        )
+
+        self.assertFalse(response.data["valid"])
+        self.assertEqual(
+            [line["status"] for line in response.data["items"]],
+            ["price_changed", "insufficient_stock", "missing"],
+        )
+        self.assertEqual(response.data["items"][0]["current_price"], "12.50")
+        self.assertFalse(response.data["items"][0]["price_matched"])
+
+    def test_malformed_item_is_rejected(self):
+        response = self.verify({"product_id": "x", "price_per_unit": "1"})
+        self.assertEqual(response.status_code, 400)
+
+
+class RehashImagesTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.media = media.name
+
+        os.makedirs(os.path.join(self.media, "product_images"))
+        for name in ("a.png", "b.png"):
+            Image.new("RGB", (4, 4), "red").save(
+                os.path.join(self.media, "product_images", name)
+            )
+        category = Category.objects.create(category_name="General")
+        Product.objects.bulk_create(
+            Product(
+                name=f"Widget {n}",
+                category=category,
+                stock_quantity=1,
+                price_per_unit=1,
+                reorder_threshold=1,
+                reorder_quantity=1,
+                image=f"product_images/{name}",
+            )
+            for n, name in enumerate(["a.png", "a.png", "b.png"])
+        )
+
+    def test_duplicates_end_up_as_one_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("generate_renditions", rehash=True, stdout=io.StringIO())
+
+        names = set(Product.objects.values_list("image", flat=True))
+        self.assertEqual(len(names), 1)
+        originals = [
+            name
+            for _, _, files in os.walk(os.path.join(self.media, "product_images"))
+            for name in files
+            if not name.endswith(".webp")
+        ]
+        self.assertEqual(originals, [os.path.basename(names.pop())])
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = CustomUser.objects.create_user(
+            "trader@example.com", "trader", "old-password"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def get_orders(self):
+        return self.client.get(reverse("user-orders-list"))
+
+    def test_repeat_requests_use_the_cache(self):
+        self.assertEqual(self.get_orders().status_code, 200)
+        with self.assertNumQueries(1):  # Only the order list itself
+            self.assertEqual(self.get_orders().status_code, 200)
+
+    def test_deactivation_evicts_the_user(self):
+        self.get_orders()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(user_cache.stats()["entries"], 0)
+        self.assertEqual(self.get_orders().status_code, 401)
+
+    def test_password_change_evicts_the_user(self):
+        self.get_orders()
+        self.user.set_password("new-password")
+        self.user.save()
+
+        self.assertEqual(user_cache.stats()["entries"], 0)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            "trader@example.com", "trader", "password"
+        )
+        self.refresh = FilteredRefreshToken.for_user(self.user)
+        self.client = APIClient()
+
+    def refresh_with(self, token):
+        return self.client.post(
+            reverse("token-refresh"), {"refresh": str(token)}, format="json"
+        )
+
+    def test_logged_out_token_cannot_refresh(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}"
+        )
+        response = self.client.post(
+            reverse("logout"), {"refresh_token": str(self.refresh)}, format="json"
+        )
+        self.assertEqual(response.status_code, 205)
+
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+    def test_rotated_token_cannot_be_replayed(self):
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 200)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+    def test_sees_rows_committed_out_of_id_order(self):
+        clock = [0]
+        self.enterContext(
+            mock.patch("warehouse_app.tokens.time.monotonic", lambda: clock[0])
+        )
+        blacklist = BlacklistFilter(
+            refresh_interval=5, reload_interval=600, commit_margin=60
+        )
+
+        def blacklisted(row_id, at):
+            token = OutstandingToken.objects.create(
+                user=self.user,
+                jti=f"jti-{row_id}",
+                token="",
+                expires_at=datetime(2100, 1, 1, tzinfo=dt_timezone.utc),
+            )
+            BlacklistedToken.objects.create(id=row_id, token=token)
+            clock[0] = at
+            return token.jti in blacklist
+
+        self.assertTrue(blacklisted(20, at=100))
+        # 25 is inserted before 26 but commits after a refresh has seen 26
+        self.assertTrue(blacklisted(26, at=180))
+        self.assertTrue(blacklisted(25, at=200))
+
+
+class DirtyFieldsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.get(
+            pk=CustomUser.objects.create_user(
+                "trader@example.com", "trader", "password", name="Old Name"
+            ).pk
+        )
+
+    def test_save_writes_only_changed_fields(self):
+        with self.assertNumQueries(0):
+            self.user.save()
+
+        self.user.name = "New Name"
+        with self.assertNumQueries(1) as queries:
+            self.user.save()
+        self.assertNotIn("email", queries.captured_queries[0]["sql"])
+
+    def test_fields_left_out_of_a_partial_save_stay_dirty(self):
+        self.user.name = "New Name"
+        self.user.save(update_fields=["last_login"])
+        self.assertEqual(self.user.get_dirty_fields(), ["name"])
+
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "New Name")
+
+
+class ProductImportTests(TestCase):
+    def test_bad_rows_are_reported_and_the_rest_imported(self):
+        header = ",".join(COLUMNS)
+        rows = [
+            "OK-1,Widget,Tools,10,9.99,5,50",
+            "NAN-1,Widget,Tools,10,NaN,5,50",
+            "INF-1,Widget,Tools,10,Infinity,5,50",
+            f"BIG-1,Widget,Tools,{2**31},9.99,5,50",
+            "NEG-1,Widget,Tools,-1,9.99,5,50",
+        ]
+
+        result = import_products(io.StringIO("\n".join([header, *rows])), "csv")
+
+        self.assertEqual((result.imported, result.rejected), (1, 4))
+        self.assertEqual([error["line"] for error in result.errors], [3, 4, 5, 6])
+        self.assertEqual(list(Product.objects.values_list("sku", flat=True)), ["OK-1"])
+
+
+class PerformanceMetricsTests(TestCase):
+    ENABLED = {"ENABLED": True, "SERVER_TIMING": True, "TOKEN": "scrape-token"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(
+            "staff@example.com", "staff", "password", is_staff=True
+        )
+
+    def test_off_by_default(self):
+        response = self.client.get(reverse("category-list"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    def test_metrics_need_staff_or_the_token(self):
+        with override_settings(PERFORMANCE_METRICS=self.ENABLED):
+            response = self.client.get(reverse("category-list"))
+            self.assertIn("Server-Timing", response)
+
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+            response = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token"
+            )
+            self.assertContains(response, "http_request_duration_seconds_bucket")
+
+            self.client.force_login(self.staff)
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+
+class JsonLines(logging.Handler):
+    """Collects records as the JSON the configured handler would write."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+        self.addFilter(RequestIdFilter())
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record):
+        self.entries.append(json.loads(self.format(record)))
+
+
+class RequestLoggingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="trader@example.com", username="trader", password="!"
+        )
+        category = Category.objects.create(category_name="General")
+        cls.product = Product.objects.create(
+            name="Widget",
+            category=category,
+            stock_quantity=100,
+            price_per_unit=10,
+            reorder_threshold=1,
+            reorder_quantity=10,
+        )
+
+    def setUp(self):
+        self.lines = JsonLines()
+        logger = logging.getLogger("warehouse_app")
+        logger.addHandler(self.lines)
+        self.addCleanup(logger.removeHandler, self.lines)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_order(self, request_id):
+        return self.client.post(
+            reverse("create-order"),
+            {"items": [{"product": self.product.pk, "quantity": 1, "price": "10"}]},
+            format="json",
+            HTTP_X_REQUEST_ID=request_id,
+        )
+
+    def test_records_carry_the_callers_request_id(self):
+        response = self.create_order("checkout-42")
+
+        self.assertEqual(response["X-Request-ID"], "checkout-42")
+        created = [e for e in self.lines.entries if e["message"].startswith("Created")]
+        self.assertEqual(created[0]["request_id"], "checkout-42")
+        self.assertEqual(created[0]["lines"], 1)
+
+    def test_invalid_request_id_is_replaced(self):
+        response = self.create_order("not a valid id")
+
+        request_id = response["X-Request-ID"]
+        self.assertRegex(request_id, r"^[0-9a-f]{32}$")
+        self.assertEqual(
+            {entry["request_id"] for entry in self.lines.entries}, {request_id}
+        )
+
+    def test_background_handler_writes_queued_records_on_close(self):
+        stream = io.StringIO()
+        handler = BackgroundHandler(stream=stream)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.makeLogRecord(
+                {"msg": "failed %s", "args": ("once",), "exc_info": sys.exc_info()}
+            )
+        handler.handle(record)
+        handler.close()
+
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry["message"], "failed once")
+        self.assertIn("ValueError: boom", entry["exception"])
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class BlacklistFilter:
+    """
+    In-memory set of blacklisted token ids, kept in step with the database
+    by fetching only rows added since an earlier refresh (the blacklist is
+    append-only apart from pruning). A full reload every ``reload_interval``
+    drops pruned entries.
+
+    Ids come from a sequence when a row is inserted, not when it commits,
+    so a row can become visible after rows with higher ids. Each refresh
+    re-reads from the highest id seen ``commit_margin`` seconds before the
+    previous refresh, which catches rows committed up to that long after
+    their insert.
+
+    Tokens blacklisted by another process become visible here within
+    ``refresh_interval`` seconds; tokens blacklisted by this process are
+    added immediately.
+    """
+
+    def __init__(self, refresh_interval, reload_interval, commit_margin):
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.commit_margin = commit_margin
+        self._jtis = set()
+        self._seen = deque()  # (refreshed at, highest id seen by then)
+        self._refreshed_at = self._reloaded_at = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        self._refresh_if_stale()
+        return jti in self._jtis
+
+    def add(self, jti):
+        with self._lock:
+            self._jtis.add(jti)
+
+    def _watermark(self, cutoff):
+        """Highest id seen by a refresh at or before ``cutoff``, or None."""
+        seen = self._seen
+        while len(seen) > 1 and seen[1][0] <= cutoff:
+            seen.popleft()
+        if seen and seen[0][0] <= cutoff:
+            return seen[0][1]
+        return None
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        if (
+            self._refreshed_at is not None
+            and now - self._refreshed_at < self.refresh_interval
+        ):
+            return
+
+        with self._lock:
+            if (
+                self._refreshed_at is not None
+                and now - self._refreshed_at < self.refresh_interval
+            ):
+                return
+
+            rows = BlacklistedToken.objects.all()
+            full_reload = (
+                self._reloaded_at is None
+                or now - self._reloaded_at >= self.reload_interval
+            )
+            watermark = None
+            if not full_reload:
+                # Rows seen by the previous refresh can't be missing, and
+                # those committed since were inserted after this cutoff
+                watermark = self._watermark(self._refreshed_at - self.commit_margin)
+            if watermark is None:
+                # Just started: re-read the live blacklist until a refresh
+                # is old enough to bound the ids
+                rows = rows.filter(token__expires_at__gt=timezone.now())
+            else:
+                rows = rows.filter(id__gt=watermark)
+
+            jtis = set() if full_reload else self._jtis
+            highest = self._seen[-1][1] if self._seen else 0
+            for row_id, jti in rows.values_list("id", "token__jti"):
+                jtis.add(jti)
+                highest = max(highest, row_id)
+
+            self._jtis = jtis
+            self._seen.append((now, highest))
+            self._refreshed_at = now
+            if full_reload:
+                self._reloaded_at = now
+
+
+blacklist_filter = BlacklistFilter(
+    refresh_interval=settings.TOKEN_BLACKLIST_FILTER["REFRESH_INTERVAL"],
+    reload_interval=settings.TOKEN_BLACKLIST_FILTER["RELOAD_INTERVAL"],
+    commit_margin=settings.TOKEN_BLACKLIST_FILTER["COMMIT_MARGIN"],
+)
+
+
+class FilteredRefreshToken(RefreshToken):
+    """Refresh token whose blacklist check is served from ``blacklist_filter``."""
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in blacklist_filter:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
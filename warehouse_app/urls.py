@@ -1,31 +1,49 @@
 from django.urls import path
+from rest_framework_simplejwt.views import TokenRefreshView
+from . import async_views
 from .views import (
     UserLoginView,
     UserRegistrationView,
     LogoutView,
+    AuthCacheStatsView,
     CategoryListCreateView,
     CategoryDetailView,
     ProductListCreateView,
     ProductDetailView,
+    LowStockProductsView,
+    ProductImportView,
+    ProductExportView,
     CreatePaymentIntentView,
     StripeWebhookView,
+    FakePaymentConfirmView,
     TransactionListView,
+    TransactionExportView,
     OrderPaymentStatusView,
     CreateOrderView,
     UserOrdersListView,
+    OrderExportView,
     CancelOrderView,
     OrderDetailView,
+    VerifyCartPricesView,
+    SalesReportView,
 )
 
 urlpatterns = [
     path("register/", UserRegistrationView.as_view(), name="register"),
     path("login/", UserLoginView.as_view(), name="login"),
     path("logout/", LogoutView.as_view(), name="logout"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("auth/cache-stats/", AuthCacheStatsView.as_view(), name="auth-cache-stats"),
     # Category Endpoints
     path("categories/", CategoryListCreateView.as_view(), name="category-list"),
     path("categories/<int:pk>/", CategoryDetailView.as_view(), name="category-detail"),
     # Product Endpoints
     path("products/", ProductListCreateView.as_view(), name="add-product"),
+    path(
+        "products/low-stock/", LowStockProductsView.as_view(), name="low-stock-products"
+    ),
+    path("products/import/", ProductImportView.as_view(), name="product-import"),
+    path("products/export/", ProductExportView.as_view(), name="product-export"),
     # path("products/<int:pk>/", ProductDetailView.as_view(), name="product-detail"),
     path(
         "products/<int:product_id>/", ProductDetailView.as_view(), name="product-detail"
@@ -37,7 +55,17 @@ urlpatterns = [
         name="create-payment-intent",
     ),
     path("stripe/webhook/", StripeWebhookView.as_view(), name="stripe-webhook"),
+    path(
+        "payments/fake/<int:transaction_id>/confirm/",
+        FakePaymentConfirmView.as_view(),
+        name="fake-payment-confirm",
+    ),
     path("transactions/", TransactionListView.as_view(), name="transaction-list"),
+    path(
+        "transactions/export/",
+        TransactionExportView.as_view(),
+        name="transaction-export",
+    ),
     path("orders/<int:pk>/cancel/", CancelOrderView.as_view(), name="cancel-order"),
     path("orders/", CreateOrderView.as_view(), name="create-order"),
     path(
@@ -46,7 +74,25 @@ urlpatterns = [
         name="order-payment-status",
     ),
     path("orders/list/", UserOrdersListView.as_view(), name="user-orders-list"),
+    path("orders/export/", OrderExportView.as_view(), name="order-export"),
     path("orders/<int:pk>/", OrderDetailView.as_view(), name="order-detail"),
+    path("cart/verify/", VerifyCartPricesView.as_view(), name="verify-cart"),
+    path("reports/sales/", SalesReportView.as_view(), name="sales-report"),
+    # Async read endpoints for the ASGI deployment
+    path("async/products/", async_views.product_list, name="async-product-list"),
+    path(
+        "async/products/<int:product_id>/",
+        async_views.product_detail,
+        name="async-product-detail",
+    ),
+    path("async/categories/", async_views.category_list, name="async-category-list"),
+    path("async/orders/list/", async_views.order_list, name="async-orders-list"),
+    path("async/orders/<int:pk>/", async_views.order_detail, name="async-order-detail"),
+    path(
+        "async/orders/<int:pk>/payment-status/",
+        async_views.order_payment_status,
+        name="async-order-payment-status",
+    ),
 ]
 
 
@@ -1,15 +1,16 @@
-import stripe
-import uuid
-from django.conf import settings
+import io
+import logging
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
-from django.db import transaction
 from django.core.exceptions import ValidationError
 from .serializers import (
     CustomUserSerializer,
@@ -17,11 +18,36 @@ from .serializers import (
     ProductSerializer,
     CategorySerializer,
     OrderSerializer,
+    OrderSummarySerializer,
     TransactionSerializer,
 )
-from .models import CustomUser, Product, Category, Order, Transaction, OrderItem
+from .authentication import user_cache
+from .catalog_cache import CatalogCacheMixin
+from .tokens import FilteredRefreshToken
+from .webhooks import record_event
+from .payments import FakeGateway, PaymentGatewayError, get_gateway
+from .idempotency import IdempotencyMixin
+from .product_io import (
+    FILE_FORMATS,
+    export_products,
+    file_format_for,
+    import_products,
+)
+from .replenishment import low_stock_products
+from .rollups import sales_report
+from .streaming import streaming_file_response
+from .exports import (
+    EXPORT_FORMATS,
+    export_orders,
+    export_transactions,
+    filter_period,
+)
+from .pagination import OrderCursorPagination, ProductCursorPagination
+from .order_state import cancel_orders
+from .services import cart_fingerprint, parse_cart_line, place_order
+from .models import CustomUser, Product, Category, Order, Transaction
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+logger = logging.getLogger(__name__)
 
 
 # Create your views here.
@@ -32,7 +58,7 @@ class UserLoginView(APIView):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            refresh = RefreshToken.for_user(user)
+            refresh = FilteredRefreshToken.for_user(user)
             access_token = str(refresh.access_token)
             return Response(
                 {
@@ -76,7 +102,7 @@ class LogoutView(APIView):
             refresh_token = request.data[
                 "refresh_token"
             ]  # Get refresh token from request
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()  # Blacklist the refresh token
 
             return Response(
@@ -88,34 +114,90 @@ class LogoutView(APIView):
             )
 
 
+class AuthCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        # Counters are per worker process
+        return Response(user_cache.stats())
+
+
 # Category Views
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(CatalogCacheMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CategoryDetailView(CatalogCacheMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
 # Product Views
-class ProductListCreateView(generics.ListCreateAPIView):
-    queryset = Product.objects.all()
+class ProductListCreateView(CatalogCacheMixin, generics.ListCreateAPIView):
+    # Categories are joined in so the nested serializer doesn't query per row
+    queryset = Product.objects.select_related("category").order_by("product_id")
     serializer_class = ProductSerializer
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [AllowAny]
+    pagination_class = ProductCursorPagination
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Product.objects.all()
+class ProductDetailView(CatalogCacheMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Product.objects.select_related("category")
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "product_id"
 
 
+class LowStockProductsView(generics.ListAPIView):
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        return low_stock_products()
+
+
+class ProductImportView(APIView):
+    parser_classes = (MultiPartParser, FormParser)
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_format = request.data.get("file_format") or file_format_for(upload.name)
+        if file_format not in FILE_FORMATS:
+            return Response(
+                {"error": f"file_format must be one of {', '.join(FILE_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        result = import_products(stream, file_format)
+        return Response(result._asdict(), status=status.HTTP_200_OK)
+
+
+class ProductExportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        file_format = request.query_params.get("export_format", "csv")
+        if file_format not in FILE_FORMATS:
+            return Response(
+                {"error": f"export_format must be one of {', '.join(FILE_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return streaming_file_response(
+            export_products(file_format), file_format, f"products.{file_format}"
+        )
+
+
 class CreatePaymentIntentView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -124,13 +206,14 @@ class CreatePaymentIntentView(APIView):
             order_id = request.data.get("order_id")
             order = get_object_or_404(Order, id=order_id, user=request.user)
 
-            # Create Stripe PaymentIntent
-            intent = stripe.PaymentIntent.create(
-                amount=int(order.total_price * 100),  # Convert to cents
-                currency="usd",
-                metadata={"order_id": order.id},
-                automatic_payment_methods={"enabled": True},
-            )
+            try:
+                intent = get_gateway().create_payment_intent(
+                    amount=int(order.total_price * 100),  # Convert to cents
+                    currency="usd",
+                    metadata={"order_id": order.id},
+                )
+            except PaymentGatewayError as e:
+                return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
 
             # Create transaction record
             transaction = Transaction.objects.create(
@@ -147,6 +230,38 @@ class CreatePaymentIntentView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class FakePaymentConfirmView(APIView):
+    """
+    Settle a payment made through the fake gateway, as the customer
+    completing checkout would. Only available when it is configured.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, transaction_id):
+        gateway = get_gateway()
+        if not isinstance(gateway, FakeGateway):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        transaction = get_object_or_404(
+            Transaction, id=transaction_id, user=request.user
+        )
+        outcome = request.data.get("outcome", "succeeded")
+        if outcome not in ("succeeded", "failed"):
+            return Response(
+                {"error": "outcome must be succeeded or failed"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        event_id, _ = gateway.confirm_payment_intent(
+            transaction.stripe_payment_intent_id,
+            succeeded=outcome == "succeeded",
+            amount=int(transaction.amount * 100),
+            metadata={"order_id": str(transaction.order_id)},
+        )
+        return Response({"event_id": event_id}, status=status.HTTP_202_ACCEPTED)
+
+
 class StripeWebhookView(APIView):
     permission_classes = []
     authentication_classes = []
@@ -157,179 +272,94 @@ class StripeWebhookView(APIView):
         sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
 
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
-            )
+            event = get_gateway().construct_event(payload, sig_header)
 
-            if event["type"] == "payment_intent.succeeded":
-                payment_intent = event["data"]["object"]
-                self.handle_successful_payment(payment_intent)
-            elif event["type"] == "payment_intent.payment_failed":
-                payment_intent = event["data"]["object"]
-                self.handle_failed_payment(payment_intent)
+            # Processing happens in the process_webhooks worker
+            record_event(event)
 
             return Response({"status": "success"})
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    def handle_successful_payment(self, payment_intent):
-        with transaction.atomic():
-            transaction_obj = Transaction.objects.get(
-                stripe_payment_intent_id=payment_intent["id"]
-            )
-            order = transaction_obj.order
-
-            # Update transaction status
-            transaction_obj.payment_status = "completed"
-            transaction_obj.save()
-
-            # Update order status
-            order.payment_status = "paid"
-            order.order_status = "processed"
-            order.save()
-
-            # Now reduce stock quantities
-            order_items = order.items.all()
-            for item in order_items:
-                product = item.product
-                product.stock_quantity -= item.quantity
-                product.save()
-
-    def handle_failed_payment(self, payment_intent):
-        with transaction.atomic():
-            transaction_obj = Transaction.objects.get(
-                stripe_payment_intent_id=payment_intent["id"]
-            )
-            order = transaction_obj.order
 
-            # Update transaction status
-            transaction_obj.payment_status = "failed"
-            transaction_obj.save()
+class TransactionListView(generics.ListAPIView):
+    serializer_class = TransactionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return filter_period(
+            Transaction.objects.filter(user=self.request.user),
+            self.request.query_params,
+            "transaction_date",
+        )
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Update order status but keep it pending
-            order.payment_status = "failed"
-            order.save()
 
+class ExportView(APIView):
+    """Stream the user's filtered records as CSV or NDJSON."""
 
-class TransactionListView(generics.ListAPIView):
-    serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    queryset = None
+    date_field = None
+    status_field = "payment_status"
+    exporter = None
+    filename = None
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user)
+        return filter_period(
+            self.queryset.filter(user=self.request.user),
+            self.request.query_params,
+            self.date_field,
+            status_field=self.status_field,
+        )
+
+    def get(self, request):
+        file_format = request.query_params.get("export_format", "csv")
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"export_format must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            queryset = self.get_queryset()
+        except ValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return streaming_file_response(
+            self.exporter(queryset, file_format),
+            file_format,
+            f"{self.filename}.{file_format}",
+        )
 
 
-class CreateOrderView(generics.CreateAPIView):
+class TransactionExportView(ExportView):
+    queryset = Transaction.objects.all()
+    date_field = "transaction_date"
+    exporter = staticmethod(export_transactions)
+    filename = "transactions"
+
+
+class CreateOrderView(IdempotencyMixin, generics.CreateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
         try:
-            user = request.user
-            data = request.data
-            items = data.get("items", [])
-            total_price = data.get("total_price", 0)
+            items = request.data.get("items", [])
 
             if not items:
                 return Response(
                     {"error": "No items provided"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # First check for existing pending orders
-            existing_pending_order = Order.objects.filter(
-                user=user, payment_status="pending", order_status="pending"
-            ).first()
-
-            if existing_pending_order:
-                # Check if the items and total price match
-                existing_items = existing_pending_order.items.all()
-                existing_items_data = [
-                    {
-                        "product": item.product.product_id,
-                        "quantity": item.quantity,
-                        "price": float(item.price),
-                    }
-                    for item in existing_items
-                ]
-
-                # Sort both lists to ensure consistent comparison
-                existing_items_data = sorted(
-                    existing_items_data, key=lambda x: x["product"]
-                )
-                new_items = sorted(items, key=lambda x: x["product"])
-
-                # Check if the orders match
-                orders_match = (
-                    len(existing_items_data) == len(new_items)
-                    and all(
-                        existing_item["product"] == new_item["product"]
-                        and existing_item["quantity"] == new_item["quantity"]
-                        and abs(existing_item["price"] - new_item["price"])
-                        < 0.01  # Using small delta for float comparison
-                        for existing_item, new_item in zip(
-                            existing_items_data, new_items
-                        )
-                    )
-                    and abs(
-                        float(existing_pending_order.total_price) - float(total_price)
-                    )
-                    < 0.01
-                )
-
-                if orders_match:
-                    return Response(
-                        {
-                            "id": existing_pending_order.id,
-                            "order_number": existing_pending_order.order_number,
-                            "message": "Using existing pending order",
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    # If the orders don't match, cancel the existing order and create a new one
-                    existing_pending_order.order_status = "cancelled"
-                    existing_pending_order.payment_status = "cancelled"
-                    existing_pending_order.save()
-
-            # Create new order
-            with transaction.atomic():
-                # Generate unique order number
-                order_number = str(uuid.uuid4())[:8]
-
-                # Create the order
-                order = Order.objects.create(
-                    user=user,
-                    order_number=order_number,
-                    total_price=total_price,
-                    order_status="pending",
-                    payment_status="pending",
-                )
-
-                # Validate and create order items
-                for item in items:
-                    product = Product.objects.get(product_id=item["product"])
-
-                    if abs(float(product.price_per_unit) - float(item["price"])) > 0.01:
-                        raise ValidationError(
-                            f"Price mismatch for {product.name}. Expected: {product.price_per_unit}, Got: {item['price']}"
-                        )
-
-                    # Check stock availability
-                    if product.stock_quantity < item["quantity"]:
-                        raise ValidationError(f"Not enough stock for {product.name}")
-
-                    # Create order item
-                    OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        quantity=item["quantity"],
-                        price=item["price"],
-                    )
-
-                return Response(
-                    {"id": order.id, "order_number": order.order_number},
-                    status=status.HTTP_201_CREATED,
-                )
+            lines = [parse_cart_line(item) for item in items]
+            return self.idempotent_response(
+                request, cart_fingerprint(lines), lambda: self.place(request, lines)
+            )
 
         except ValidationError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -338,21 +368,70 @@ class CreateOrderView(generics.CreateAPIView):
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def place(self, request, lines):
+        order, created = place_order(request.user, lines)
+
+        if not created:
+            return Response(
+                {
+                    "id": order.id,
+                    "order_number": order.order_number,
+                    "message": "Using existing pending order",
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        return Response(
+            {"id": order.id, "order_number": order.order_number},
+            status=status.HTTP_201_CREATED,
+        )
+
 
 class OrderPaymentStatusView(generics.RetrieveUpdateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return Order.objects.filter(user=self.request.user).with_items()
 
 
 class UserOrdersListView(generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
+
+    def is_summary(self):
+        return self.request.query_params.get("view") == "summary"
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return OrderSummarySerializer
+        return OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by("-order_date")
+        queryset = filter_period(
+            Order.objects.filter(user=self.request.user),
+            self.request.query_params,
+            "order_date",
+            status_field="order_status",
+        ).order_by("-order_date", "-id")
+        if self.is_summary():
+            return queryset.with_item_count()
+        return queryset.with_items()
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class OrderExportView(ExportView):
+    queryset = Order.objects.all()
+    date_field = "order_date"
+    status_field = "order_status"
+    exporter = staticmethod(export_orders)
+    filename = "orders"
 
 
 class CancelOrderView(APIView):
@@ -360,80 +439,47 @@ class CancelOrderView(APIView):
 
     def post(self, request, pk):
         try:
-            print(f"Attempting to find order {pk} for user {request.user.id}")
+            # One conditional UPDATE; a payment that lands first wins
+            cancelled = cancel_orders(Order.objects.filter(id=pk, user=request.user))
+            if cancelled:
+                logger.info("Cancelled order %s", pk)
+                return Response(
+                    {"message": "Order cancelled successfully"},
+                    status=status.HTTP_200_OK,
+                )
 
-            # Check if order exists
-            order = Order.objects.filter(id=pk).first()
+            # Nothing was cancelled; find out why
+            order = Order.objects.filter(id=pk).only("user", "payment_status").first()
             if not order:
-                print(f"Order {pk} not found")
+                logger.info("Order %s not found", pk)
                 return Response(
                     {"error": f"Order {pk} not found"}, status=status.HTTP_404_NOT_FOUND
                 )
 
             # Check if user owns the order
-            if order.user != request.user:
-                print(f"Order {pk} does not belong to user {request.user.id}")
+            if order.user_id != request.user.id:
+                logger.warning(
+                    "User %s tried to cancel order %s of another user",
+                    request.user.id,
+                    pk,
+                )
                 return Response(
                     {"error": "Not authorized to cancel this order"},
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            print(
-                f"Found order: {order.id}, status: {order.order_status}, payment: {order.payment_status}"
+            logger.info(
+                "Order %s can't be cancelled, payment is %s",
+                order.id,
+                order.payment_status,
+            )
+            return Response(
+                {"error": "Cannot cancel orders that have been paid"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-
-            # Only allow cancellation of pending or failed payment orders
-            if order.payment_status not in ["pending", "failed"]:
-                print(
-                    f"Cannot cancel order with payment status: {order.payment_status}"
-                )
-                return Response(
-                    {"error": "Cannot cancel orders that have been paid"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            try:
-                with transaction.atomic():
-                    # Update order status
-                    order.order_status = "cancelled"
-                    order.payment_status = "cancelled"
-                    order.save()
-                    print(f"Updated order {order.id} status to cancelled")
-
-                    # If there are any transactions, mark them as cancelled
-                    # Using the correct related_name 'transactions' instead of 'transaction_set'
-                    order.transactions.all().update(payment_status="failed")
-                    print(f"Updated transactions to failed")
-
-                    # Return any reserved stock
-                    order_items = order.items.all()
-                    for item in order_items:
-                        product = item.product
-                        # Only add back to stock if it was previously reserved
-                        if order.order_status == "pending":
-                            product.stock_quantity += item.quantity
-                            product.save()
-                            print(
-                                f"Returned {item.quantity} units to product {product.id}"
-                            )
-
-                return Response(
-                    {"message": "Order cancelled successfully"},
-                    status=status.HTTP_200_OK,
-                )
-
-            except Exception as e:
-                print(f"Database transaction error: {str(e)}")
-                return Response(
-                    {"error": "Error updating order status"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
 
         except Exception as e:
-            import traceback
-
-            print(f"Error in CancelOrderView: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Error cancelling order %s", pk)
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
@@ -444,30 +490,120 @@ class OrderDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return Order.objects.filter(user=self.request.user).with_items()
 
 
-# views.py
 class VerifyCartPricesView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         cart_items = request.data.get("items", [])
+        if not isinstance(cart_items, list):
+            return Response(
+                {"error": "items must be a list"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = []
+        for position, item in enumerate(cart_items):
+            try:
+                lines.append(
+                    (
+                        int(item["product_id"]),
+                        Decimal(str(item["price_per_unit"])),
+                        int(item.get("quantity", 1)),
+                    )
+                )
+            except (KeyError, TypeError, ValueError, AttributeError, InvalidOperation):
+                return Response(
+                    {"error": f"Invalid cart item at position {position}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        # Resolve the whole cart in one query
+        products = Product.objects.only(
+            "product_id", "name", "price_per_unit", "stock_quantity"
+        ).in_bulk({product_id for product_id, _, _ in lines})
+
         verification_results = []
+        for product_id, cart_price, quantity in lines:
+            product = products.get(product_id)
+            if product is None:
+                # Products are retired by deleting them
+                verification_results.append(
+                    {
+                        "product_id": product_id,
+                        "cart_price": str(cart_price),
+                        "quantity": quantity,
+                        "status": "missing",
+                    }
+                )
+                continue
+
+            price_matched = product.price_per_unit == cart_price
+            if product.stock_quantity < quantity:
+                line_status = "insufficient_stock"
+            elif not price_matched:
+                line_status = "price_changed"
+            else:
+                line_status = "ok"
 
-        for item in cart_items:
-            product = Product.objects.get(product_id=item["product_id"])
             verification_results.append(
                 {
-                    "product_id": item["product_id"],
+                    "product_id": product_id,
                     "name": product.name,
                     "current_price": str(product.price_per_unit),
-                    "cart_price": str(item["price_per_unit"]),
-                    "price_matched": abs(
-                        float(product.price_per_unit) - float(item["price_per_unit"])
-                    )
-                    < 0.01,
+                    "cart_price": str(cart_price),
+                    "price_matched": price_matched,
+                    "quantity": quantity,
+                    "stock_quantity": product.stock_quantity,
+                    "status": line_status,
                 }
             )
 
-        return Response(verification_results)
+        return Response(
+            {
+                "valid": all(line["status"] == "ok" for line in verification_results),
+                "items": verification_results,
+            }
+        )
+
+
+class SalesReportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+
+    def get(self, request):
+        by = request.query_params.get("by", "category")
+        if by not in ("product", "category"):
+            return Response(
+                {"error": "by must be product or category"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            last_day = self.parse_day("to") or timezone.localdate()
+            first_day = self.parse_day("from") or last_day - timedelta(
+                days=self.DEFAULT_DAYS - 1
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not timedelta(0) <= last_day - first_day < timedelta(days=self.MAX_DAYS):
+            return Response(
+                {"error": f"from..to must span 1 to {self.MAX_DAYS} days"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(sales_report(by, first_day, last_day))
+
+    def parse_day(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:  # Well formed but not a real date
+            day = None
+        if day is None:
+            raise ValueError(f"{name} must be a YYYY-MM-DD date")
+        return day
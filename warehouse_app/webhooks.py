@@ -0,0 +1,202 @@
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .logs import request_context
+from .models import Order, Transaction, WebhookEvent
+from .order_state import FAIL_PAYMENT, PAY, apply_transition
+from .rollups import record_sales
+from .services import decrement_stock, order_quantities
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+MAX_ATTEMPTS = 8
+# A claimed event becomes due again if its worker dies before finishing it
+CLAIM_TIMEOUT = timedelta(minutes=5)
+EVENT_RESULT_FIELDS = ["status", "next_attempt_at", "last_error", "processed_at"]
+
+
+def record_event(event):
+    """
+    Store a verified Stripe event in the inbox. Redeliveries of an event
+    that is already recorded are ignored.
+    """
+    payload = event.to_dict() if hasattr(event, "to_dict") else event
+    data = payload["data"]["object"]
+    payment_intent_id = data["id"] if data.get("object") == "payment_intent" else ""
+
+    WebhookEvent.objects.bulk_create(
+        [
+            WebhookEvent(
+                event_id=payload["id"],
+                event_type=payload["type"],
+                payment_intent_id=payment_intent_id,
+                payload=payload,
+                event_created=datetime.fromtimestamp(
+                    payload["created"], tz=dt_timezone.utc
+                ),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    logger.info(
+        "Recorded webhook event %s",
+        payload["id"],
+        extra={"event_type": payload["type"], "payment_intent_id": payment_intent_id},
+    )
+
+
+def settle_transaction(payment_intent, payment_status):
+    """
+    Move the intent's transaction to ``payment_status`` unless it has
+    completed. Returns it, or None when there was nothing to change.
+    """
+    transaction_obj = Transaction.objects.select_related("order").get(
+        stripe_payment_intent_id=payment_intent["id"]
+    )
+    settled = (
+        Transaction.objects.filter(id=transaction_obj.id)
+        .exclude(payment_status="completed")
+        .update(payment_status=payment_status, updated_at=timezone.now())
+    )
+    return transaction_obj if settled else None
+
+
+def handle_successful_payment(payment_intent):
+    with transaction.atomic():
+        transaction_obj = settle_transaction(payment_intent, "completed")
+        if transaction_obj is None:
+            return
+        order = transaction_obj.order
+
+        if not apply_transition(PAY, Order.objects.filter(id=order.id)):
+            # Cancelled (or paid through another intent) first
+            logger.warning(
+                "Payment captured for order %s, which is no longer payable",
+                order.order_number,
+                extra={"payment_intent_id": payment_intent["id"]},
+            )
+            return
+        record_sales([order.id])
+        logger.info("Order %s paid", order.order_number)
+
+        # Now reduce stock quantities
+        quantities = order_quantities(order)
+        result = decrement_stock(quantities)
+        if not result.applied:
+            # The payment has already been captured, so take what stock
+            # allows and leave the short SKUs for the warehouse to resolve
+            logger.warning(
+                "Insufficient stock for paid order %s: %s",
+                order.order_number,
+                result.shortfalls,
+            )
+            decrement_stock(
+                {
+                    product_id: quantity
+                    for product_id, quantity in quantities.items()
+                    if product_id not in result.shortfalls
+                }
+            )
+
+
+def handle_failed_payment(payment_intent):
+    with transaction.atomic():
+        transaction_obj = settle_transaction(payment_intent, "failed")
+        if transaction_obj is None:
+            return
+        order = transaction_obj.order
+
+        # The order stays pending so the payment can be retried
+        if apply_transition(FAIL_PAYMENT, Order.objects.filter(id=order.id)):
+            logger.info("Payment for order %s failed", order.order_number)
+
+
+EVENT_HANDLERS = {
+    "payment_intent.succeeded": handle_successful_payment,
+    "payment_intent.payment_failed": handle_failed_payment,
+}
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def process_event(event):
+    handler = EVENT_HANDLERS.get(event.event_type)
+    if handler is not None:
+        handler(event.payload["data"]["object"])
+
+
+def due_events(now):
+    """
+    Pending events that are due and have no older pending event for their
+    payment intent, so each intent's events run in the order Stripe created
+    them and a waiting event never takes a batch slot.
+    """
+    older = WebhookEvent.objects.filter(
+        Q(event_created__lt=OuterRef("event_created"))
+        | Q(event_created=OuterRef("event_created"), id__lt=OuterRef("id")),
+        status="pending",
+        payment_intent_id=OuterRef("payment_intent_id"),
+    )
+    return WebhookEvent.objects.filter(
+        Q(payment_intent_id="") | ~Exists(older),
+        status="pending",
+        next_attempt_at__lte=now,
+    )
+
+
+def claim_events(batch_size, now):
+    """
+    Lock up to ``batch_size`` due events, skipping those another worker has
+    locked, and lease them for CLAIM_TIMEOUT. Each claim counts as an
+    attempt, so a worker that dies mid-event still uses up a retry.
+    """
+    with transaction.atomic():
+        events = list(
+            due_events(now)
+            .select_for_update(skip_locked=True)
+            .order_by("event_created", "id")[:batch_size]
+        )
+        WebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+            attempts=F("attempts") + 1, next_attempt_at=now + CLAIM_TIMEOUT
+        )
+    for event in events:
+        event.attempts += 1
+    return events
+
+
+def process_webhook_batch(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Process up to ``batch_size`` due inbox events and return how many were
+    attempted. Each event commits in its own transaction together with its
+    status, so locks taken by one event aren't held while the rest run.
+    Failures are retried with exponential backoff and marked ``failed``
+    after ``max_attempts``.
+    """
+    now = timezone.now()
+    events = claim_events(batch_size, now)
+    for event in events:
+        try:
+            # Records logged while handling the event carry its id
+            with request_context(event.event_id), transaction.atomic():
+                process_event(event)
+                event.status = "processed"
+                event.processed_at = timezone.now()
+                event.last_error = ""
+                event.save(update_fields=EVENT_RESULT_FIELDS)
+        except Exception as e:
+            logger.exception("Webhook event %s failed", event.event_id)
+            event.status = "failed" if event.attempts >= max_attempts else "pending"
+            event.processed_at = None
+            event.last_error = str(e)
+            event.next_attempt_at = now + retry_delay(event.attempts)
+            event.save(update_fields=EVENT_RESULT_FIELDS)
+
+    return len(events)
@@ -29,6 +29,27 @@ STRIPE_SECRET_KEY = "sk_test_51Oy7iWC3Xe9wU4qjrUMet3GBe3iGxj26EjOR82tBvtdeGhwK1J
 STRIPE_WEBHOOK_SECRET = (
     "whsec_a501137686327b31d308a162b93f25f914c6a44e109aa357d7d887c98804ee7c"
 )
+
+# Payment provider used by checkout. Set PAYMENT_GATEWAY=fake to use the
+# in-process fake, which needs no network and emits signed webhooks when
+# a payment is confirmed (for local development and load tests).
+PAYMENT_GATEWAY = {
+    "BACKEND": "warehouse_app.payments.StripeGateway",
+    "OPTIONS": {
+        "api_key": STRIPE_SECRET_KEY,
+        "webhook_secret": STRIPE_WEBHOOK_SECRET,
+        "connect_timeout": 3.05,  # seconds
+        "read_timeout": 10,  # seconds
+        "max_network_retries": 2,
+        "pool_size": 10,  # keep-alive connections shared by the worker's threads
+    },
+}
+if os.environ.get("PAYMENT_GATEWAY") == "fake":
+    PAYMENT_GATEWAY = {
+        "BACKEND": "warehouse_app.payments.FakeGateway",
+        "OPTIONS": {"webhook_secret": STRIPE_WEBHOOK_SECRET},
+    }
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
@@ -58,11 +79,24 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_REFRESH_SERIALIZER": "warehouse_app.tokens.FilteredTokenRefreshSerializer",
+}
+
+# In-memory view of the token blacklist used for refresh/logout checks.
+# Tokens blacklisted by another worker are seen after REFRESH_INTERVAL.
+TOKEN_BLACKLIST_FILTER = {
+    "REFRESH_INTERVAL": 5,  # seconds
+    "RELOAD_INTERVAL": 600,  # seconds
+    # Longest expected gap between inserting a blacklist row and committing it
+    "COMMIT_MARGIN": 60,  # seconds
 }
 
 CORS_ORIGIN_ALLOW_ALL = True
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "warehouse_app.instrumentation.PerformanceMiddleware",
+    "warehouse_app.logs.RequestIdMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -96,11 +130,45 @@ WSGI_APPLICATION = "warehouse_project.wsgi.application"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "warehouse_app.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
 }
 
+# Cache used for catalog payloads. Use a shared backend (Redis/Memcached)
+# when running several workers so invalidations reach all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+CATALOG_CACHE_TIMEOUT = 60 * 15  # seconds
+
+# Orders still awaiting payment after this long are cancelled by the
+# expire_pending_orders command
+PENDING_ORDER_TTL = 60 * 60 * 24  # seconds
+
+# Responses stored for an Idempotency-Key are replayed for this long; after
+# that the key can be reused, and prune_idempotency_keys deletes the row
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds
+
+# Per-request timing, off by default since it reveals routes and timings.
+# PERFORMANCE_METRICS=on records per-route histograms, served at /metrics to
+# staff users and to requests bearing METRICS_TOKEN. SERVER_TIMING=on also
+# sends a Server-Timing header with every response.
+PERFORMANCE_METRICS = {
+    "ENABLED": os.environ.get("PERFORMANCE_METRICS") == "on",
+    "SERVER_TIMING": os.environ.get("SERVER_TIMING") == "on",
+    "TOKEN": os.environ.get("METRICS_TOKEN"),
+}
+
+# Per-process cache of authenticated users, keyed by user id and token
+AUTH_USER_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TTL": 60,  # seconds
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -123,6 +191,16 @@ DATABASES = {
     }
 }
 
+# Local development and test runs can use SQLite instead:
+#   DATABASE_ENGINE=sqlite python manage.py test
+if os.environ.get("DATABASE_ENGINE") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -168,3 +246,43 @@ AUTH_USER_MODEL = "warehouse_app.CustomUser"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Threads rendering product image thumbnails in the background
+IMAGE_RENDITION_WORKERS = 2
+
+# JSON lines on stderr, written by a background thread. Records carry the
+# request's X-Request-ID. LOG_DEBUG_SAMPLE_RATE is the share of requests
+# whose DEBUG records are kept when LOG_LEVEL=DEBUG.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "warehouse_app.logs.RequestIdFilter"},
+        "sample_debug": {
+            "()": "warehouse_app.logs.SamplingFilter",
+            "rate": float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.1")),
+        },
+    },
+    "handlers": {
+        "json": {
+            "()": "warehouse_app.logs.BackgroundHandler",
+            "filters": ["request_id", "sample_debug"],
+        },
+    },
+    "root": {"handlers": ["json"], "level": "WARNING"},
+    "loggers": {
+        "django": {"handlers": ["json"], "level": "INFO", "propagate": False},
+        "warehouse_app": {
+            "handlers": ["json"],
+            "level": os.environ.get("LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+# Order numbers are PREFIX + a zero-padded base-36 sequence. Each worker
+# reserves BLOCK_SIZE numbers at a time, so most orders need no query.
+ORDER_NUMBERS = {
+    "PREFIX": "MG",
+    "BLOCK_SIZE": 100,
+}
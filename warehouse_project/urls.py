@@ -20,9 +20,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from warehouse_app.instrumentation import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/accounts/", include("warehouse_app.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # Serve media files in development